@@ -1,9 +1,33 @@
+import argparse
 import game
 import board
+import engine
+import utils
 
 
 if __name__ == "__main__":
-    game = game.Game()
+    parser = argparse.ArgumentParser(description="chess")
+    parser.add_argument(
+        "--engine",
+        choices=["black", "white"],
+        help="let the search engine play the given color",
+    )
+    parser.add_argument(
+        "--network",
+        help="evaluate with this NNUE network (.npz, needs numpy) instead of the built-in evaluation",
+    )
+    args = parser.parse_args()
+
+    evaluator = None
+    if args.network:
+        import nnue
+
+        evaluator = nnue.NNUEEvaluator(nnue.Network.load(args.network))
+
+    search_engine = engine.SearchEngine(evaluator=evaluator) if args.engine else None
+    engine_color = utils.Color[args.engine.upper()] if args.engine else utils.Color.WHITE
+
+    game = game.Game(search_engine, engine_color)
     game_ui = board.GameRenderer(game.event_handler)
     game.set_screen(game_ui)
     game.run()
@@ -0,0 +1,176 @@
+"""
+Analyse a stream of FEN positions on all cores, writing one JSON line per position.
+
+    python3 analyse.py positions.fen --nodes 200000 > analysis.jsonl
+    cat positions.fen | python3 analyse.py --time 0.5 --ordered
+
+Results come out in completion order unless `--ordered` is given. At most
+`max_in_flight` positions are queued or buffered at any time, so memory
+stays constant however long the input is, and a slow reader of the output
+slows the input down instead of piling up results.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterable, Iterator, Optional
+
+import engine
+import game
+import notation
+
+# a search budget of nodes or time only, without a depth limit of its own
+MAX_SEARCH_DEPTH = 64
+
+_worker_engine: Optional[engine.SearchEngine] = None
+_worker_max_nodes: Optional[int] = None
+
+
+def _init_worker(max_depth: int, time_limit: float, max_nodes: Optional[int]) -> None:
+    global _worker_engine, _worker_max_nodes
+    _worker_engine = engine.SearchEngine(max_depth=max_depth, time_limit=time_limit)
+    _worker_max_nodes = max_nodes
+
+
+def analyse_fen(
+    fen: str,
+    search_engine: engine.SearchEngine,
+    max_nodes: Optional[int] = None,
+) -> dict[str, Any]:
+    """search one position, every position starts with fresh search tables"""
+    chess_game = game.Game()
+    try:
+        chess_game.load_fen(fen)
+    except ValueError as error:
+        return {"fen": fen, "error": str(error)}
+
+    search_engine.new_game()
+    result = search_engine.search(
+        engine.Position.from_game(chess_game), max_nodes=max_nodes
+    )
+
+    return {
+        "fen": fen,
+        "best_move": (
+            notation.move_to_standard(result.best_move) if result.best_move else None
+        ),
+        "score": result.score,
+        "depth": result.depth,
+        "pv": [notation.move_to_standard(move) for move in result.pv],
+        "nodes": result.nodes,
+        "time": round(result.elapsed, 4),
+        "nps": int(result.nodes / result.elapsed) if result.elapsed else 0,
+    }
+
+
+def _analyse_in_worker(fen: str) -> dict[str, Any]:
+    return analyse_fen(fen, _worker_engine, _worker_max_nodes)
+
+
+def read_fens(lines: Iterable[str]) -> Iterator[str]:
+    """non empty lines, `#` starts a comment line"""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def analyse_positions(
+    fens: Iterable[str],
+    workers: Optional[int] = None,
+    max_depth: int = MAX_SEARCH_DEPTH,
+    time_limit: float = 1.0,
+    max_nodes: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """
+    Analyse `fens` across a process pool, yielding a result per position
+    with its `index` in the input.
+    Results are yielded as they complete, or in input order if `ordered`.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    pending_fens = enumerate(fens)
+    in_flight: dict[Future, int] = {}
+    # completed results waiting for an earlier one, only when `ordered`
+    buffered: dict[int, dict[str, Any]] = {}
+    next_index = 0
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(max_depth, time_limit, max_nodes)
+    ) as executor:
+
+        def submit_more() -> None:
+            while len(in_flight) + len(buffered) < max_in_flight:
+                item = next(pending_fens, None)
+                if item is None:
+                    return
+                index, fen = item
+                in_flight[executor.submit(_analyse_in_worker, fen)] = index
+
+        submit_more()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                record = {"index": index, **future.result()}
+                if not ordered:
+                    yield record
+                    continue
+
+                buffered[index] = record
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+            submit_more()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="analyse FEN positions to JSONL")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="file of FENs, one per line (default stdin)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="JSONL file (default stdout)"
+    )
+    parser.add_argument("--workers", type=int, help="processes (default all cores)")
+    parser.add_argument("--depth", type=int, default=MAX_SEARCH_DEPTH)
+    parser.add_argument("--nodes", type=int, help="node budget per position")
+    parser.add_argument(
+        "--time",
+        type=float,
+        help="seconds per position (default 1, unlimited when only --nodes is given)",
+    )
+    parser.add_argument("--max-in-flight", type=int, help="default 2 per worker")
+    parser.add_argument(
+        "--ordered", action="store_true", help="write results in input order"
+    )
+    args = parser.parse_args()
+
+    time_limit = args.time
+    if time_limit is None:
+        time_limit = math.inf if args.nodes else 1.0
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = (
+        sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    )
+    with input_file, output_file:
+        for record in analyse_positions(
+            read_fens(input_file),
+            workers=args.workers,
+            max_depth=args.depth,
+            time_limit=time_limit,
+            max_nodes=args.nodes,
+            max_in_flight=args.max_in_flight,
+            ordered=args.ordered,
+        ):
+            output_file.write(json.dumps(record) + "\n")
+            output_file.flush()
@@ -0,0 +1,45 @@
+import unittest
+import analyse
+import engine
+import game
+import utils
+
+FENS = [
+    "4k3/8/8/8/8/8/8/4K2R w - - 0 1",
+    "not a fen",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b - - 0 1",
+]
+
+
+class TestAnalyse(unittest.TestCase):
+    def test_load_fen(self):
+        chess_game = game.Game()
+        chess_game.load_fen(FENS[0])
+        self.assertEqual(chess_game.get_turn(), utils.Color.WHITE)
+        self.assertEqual(chess_game.get_board()["H8"].piece_type, utils.PieceType.ROOK)
+        self.assertIsNone(chess_game.get_board()["A1"])
+
+    def test_analyse_fen(self):
+        search_engine = engine.SearchEngine(max_depth=3, time_limit=10)
+        record = analyse.analyse_fen(FENS[0], search_engine, max_nodes=5000)
+        self.assertEqual(record["fen"], FENS[0])
+        self.assertEqual(record["depth"], 3)
+        self.assertEqual(record["pv"][0], record["best_move"])
+        self.assertGreater(record["score"], 0)
+        self.assertLessEqual(record["nodes"], 5000)
+
+        self.assertIn("error", analyse.analyse_fen(FENS[1], search_engine))
+
+    def test_analyse_positions_ordered(self):
+        records = list(
+            analyse.analyse_positions(
+                FENS, workers=2, max_depth=2, max_in_flight=2, ordered=True
+            )
+        )
+        self.assertEqual([record["index"] for record in records], [0, 1, 2])
+        self.assertIn("error", records[1])
+        self.assertEqual(records[2]["pv"][0], records[2]["best_move"])
+
+
+if __name__ == "__main__":
+    unittest.main()
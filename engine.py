@@ -0,0 +1,815 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Optional, Any
+
+import pieces
+import utils
+from game_types import GameInterface
+
+# a move is a pair of square names, e.g ("E2", "E4")
+Move = tuple[str, str]
+
+SQUARE_NAMES = [
+    utils.create_square_name(file, rank) for rank in utils.RANKS for file in utils.FILES
+]
+
+PIECE_VALUES = {
+    utils.PieceType.PAWN: 100,
+    utils.PieceType.KNIGHT: 320,
+    utils.PieceType.BISHOP: 330,
+    utils.PieceType.ROOK: 500,
+    utils.PieceType.QUEEN: 900,
+    utils.PieceType.KING: 20000,
+}
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+# deeper than any search plus its quiescence, scores beyond
+# MATE_SCORE - MAX_PLY are "king captured in n plies"
+MAX_PLY = 256
+
+# distance of each square to the board center, 1 (center) .. 7 (corner)
+CENTER_DISTANCE = {
+    square_name: max(
+        abs(2 * (ord(square_name[0]) - utils.File_A) - 7),
+        abs(2 * (int(square_name[1:]) - utils.Rank_1) - 7),
+    )
+    for square_name in SQUARE_NAMES
+}
+
+
+def _generate_zobrist_keys() -> tuple[dict[tuple[str, utils.Color, utils.PieceType], int], int]:
+    rng = random.Random(0x5EED)
+    piece_keys = {
+        (square_name, color, piece_type): rng.getrandbits(64)
+        for square_name in SQUARE_NAMES
+        for color in (utils.Color.BLACK, utils.Color.WHITE)
+        for piece_type in utils.PieceType
+    }
+    return piece_keys, rng.getrandbits(64)
+
+
+ZOBRIST_PIECE_KEYS, ZOBRIST_TURN_KEY = _generate_zobrist_keys()
+
+
+def opponent_of(color: utils.Color) -> utils.Color:
+    """E.g BLACK => WHITE"""
+    return utils.Color.BLACK if color == utils.Color.WHITE else utils.Color.WHITE
+
+
+def to_file_rank(square_name: str) -> tuple[int, int]:
+    """E.g "A1" => (65, 1), the reverse of `utils.create_square_name`"""
+    return (ord(square_name[0]), int(square_name[1:]))
+
+
+def _squares_at(square_name: str, deltas: list[list[int]]) -> list[str]:
+    file, rank = to_file_rank(square_name)
+    return [
+        utils.create_square_name(file + file_delta, rank + rank_delta)
+        for file_delta, rank_delta in deltas
+        if utils.are_rank_and_file_within_board(file + file_delta, rank + rank_delta)
+    ]
+
+
+def _ray(square_name: str, file_delta: int, rank_delta: int) -> list[str]:
+    file, rank = to_file_rank(square_name)
+    squares: list[str] = []
+    file, rank = file + file_delta, rank + rank_delta
+    while utils.are_rank_and_file_within_board(file, rank):
+        squares.append(utils.create_square_name(file, rank))
+        file, rank = file + file_delta, rank + rank_delta
+    return squares
+
+
+BISHOP_DIRECTIONS = [[1, 1], [-1, -1], [1, -1], [-1, 1]]
+ROOK_DIRECTIONS = [[1, 0], [-1, 0], [0, 1], [0, -1]]
+
+# square name => squares reached by a knight / a king
+KNIGHT_TARGETS = {
+    square_name: _squares_at(square_name, pieces.KNIGHT_MOVE_DELTAS)
+    for square_name in SQUARE_NAMES
+}
+KING_TARGETS = {
+    square_name: _squares_at(square_name, pieces.KING_MOVE_DELTAS)
+    for square_name in SQUARE_NAMES
+}
+# square name => rays of squares, nearest first
+BISHOP_RAYS = {
+    square_name: [_ray(square_name, *direction) for direction in BISHOP_DIRECTIONS]
+    for square_name in SQUARE_NAMES
+}
+ROOK_RAYS = {
+    square_name: [_ray(square_name, *direction) for direction in ROOK_DIRECTIONS]
+    for square_name in SQUARE_NAMES
+}
+# color => square name => squares a pawn of that color captures on,
+# black pawns walk up the ranks, white pawns walk down
+PAWN_CAPTURE_TARGETS = {
+    utils.Color.BLACK: {
+        square_name: _squares_at(square_name, [[-1, 1], [1, 1]])
+        for square_name in SQUARE_NAMES
+    },
+    utils.Color.WHITE: {
+        square_name: _squares_at(square_name, [[-1, -1], [1, -1]])
+        for square_name in SQUARE_NAMES
+    },
+}
+
+SLIDER_TYPES = {
+    utils.PieceType.BISHOP: (utils.PieceType.BISHOP, utils.PieceType.QUEEN),
+    utils.PieceType.ROOK: (utils.PieceType.ROOK, utils.PieceType.QUEEN),
+}
+
+
+class Position(GameInterface):
+    """
+    Search-side copy of a game board.
+    Moves are made and unmade in place while the zobrist `key` is kept
+    up to date incrementally.
+    """
+
+    def __init__(
+        self, board: dict[str, Optional[pieces.Piece]], turn: utils.Color
+    ) -> None:
+        self.__board: dict[str, Optional[pieces.Piece]] = {
+            square_name: board.get(square_name) for square_name in SQUARE_NAMES
+        }
+        self.__turn = turn
+        self.__history: list[tuple[Move, Optional[pieces.Piece]]] = []
+
+        # optional incremental evaluation state, e.g `nnue.Accumulator`,
+        # told about every `make_move` / `unmake_move`
+        self.accumulator: Optional[Any] = None
+
+        self.key = ZOBRIST_TURN_KEY if turn == utils.Color.WHITE else 0
+        for square_name, piece in self.__board.items():
+            if piece:
+                self.key ^= ZOBRIST_PIECE_KEYS[(square_name, piece.color, piece.piece_type)]
+
+    @classmethod
+    def from_game(cls, game: Any) -> "Position":
+        """snapshot board and turn of a running `game.Game`"""
+        return cls(game.get_board(), game.get_turn())
+
+    def copy(self) -> "Position":
+        """copy board and turn, move history is not copied"""
+        return Position(self.__board, self.__turn)
+
+    @property
+    def ply(self) -> int:
+        """number of moves made on this position so far"""
+        return len(self.__history)
+
+    def get_turn(self) -> utils.Color:
+        return self.__turn
+
+    def switch_turn(self) -> None:
+        self.__turn = opponent_of(self.__turn)
+        self.key ^= ZOBRIST_TURN_KEY
+
+    def get_board(self) -> dict[str, Optional[Any]]:
+        return self.__board
+
+    def check_2_squares_hold_enemies(
+        self, square_name_1: str, square_name_2: str
+    ) -> bool:
+        piece_1 = self.__board.get(square_name_1)
+        piece_2 = self.__board.get(square_name_2)
+
+        return piece_1 is not None and piece_2 is not None and piece_1.color != piece_2.color
+
+    def check_square_occupied(self, square_name: str) -> bool:
+        return square_name not in self.__board or self.__board[square_name] is not None
+
+    def put_piece(self, square_name: str, piece: Optional[pieces.Piece]) -> None:
+        """
+        Set `square_name` outside of the move rules, e.g for board setup.
+        This is not recorded in the move history, so it can not be unmade.
+        """
+        if old_piece := self.__board[square_name]:
+            self.key ^= ZOBRIST_PIECE_KEYS[(square_name, old_piece.color, old_piece.piece_type)]
+        if piece:
+            self.key ^= ZOBRIST_PIECE_KEYS[(square_name, piece.color, piece.piece_type)]
+
+        self.__board[square_name] = piece
+        # incremental evaluation state no longer matches the board
+        self.accumulator = None
+
+    def generate_moves(self) -> list[Move]:
+        """all moves of the side to move, in a stable order"""
+        moves: list[Move] = []
+        for square_name, piece in self.__board.items():
+            if piece is None or piece.color != self.__turn:
+                continue
+            destinations = piece.calculate_available_moves(to_file_rank(square_name), self)
+            moves.extend((square_name, dest) for dest in sorted(destinations))
+
+        return moves
+
+    def generate_captures(self) -> list[Move]:
+        """
+        Only the captures of the side to move.
+        Much cheaper than filtering `generate_moves`, as quiet moves are never built.
+        """
+        captures: list[Move] = []
+        for square_name, piece in self.__board.items():
+            if piece is None or piece.color != self.__turn:
+                continue
+            for target in self.__capture_targets(square_name, piece):
+                captures.append((square_name, target))
+
+        return captures
+
+    def __capture_targets(self, square_name: str, piece: pieces.Piece) -> list[str]:
+        piece_type = piece.piece_type
+        if piece_type == utils.PieceType.PAWN:
+            candidates = PAWN_CAPTURE_TARGETS[piece.color][square_name]
+        elif piece_type == utils.PieceType.KNIGHT:
+            candidates = KNIGHT_TARGETS[square_name]
+        elif piece_type == utils.PieceType.KING:
+            candidates = KING_TARGETS[square_name]
+        else:
+            candidates = []
+            rays = []
+            if piece_type in SLIDER_TYPES[utils.PieceType.BISHOP]:
+                rays += BISHOP_RAYS[square_name]
+            if piece_type in SLIDER_TYPES[utils.PieceType.ROOK]:
+                rays += ROOK_RAYS[square_name]
+            for ray in rays:
+                for target in ray:
+                    if self.__board[target] is not None:
+                        candidates.append(target)
+                        break
+
+        return [
+            target
+            for target in candidates
+            if (target_piece := self.__board[target]) is not None
+            and target_piece.color != piece.color
+        ]
+
+    def least_valuable_attacker(
+        self, square_name: str, color: utils.Color, removed: set[str]
+    ) -> Optional[str]:
+        """
+        Square of the cheapest `color` piece attacking `square_name`.
+        Pieces on `removed` squares are treated as gone, so x-ray attackers
+        behind them are found too.
+        """
+
+        def holds(target: str, piece_types: tuple[utils.PieceType, ...]) -> bool:
+            piece = self.__board[target]
+            return (
+                piece is not None
+                and piece.color == color
+                and piece.piece_type in piece_types
+                and target not in removed
+            )
+
+        # a pawn attacks `square_name` from where an enemy pawn would capture
+        for target in PAWN_CAPTURE_TARGETS[opponent_of(color)][square_name]:
+            if holds(target, (utils.PieceType.PAWN,)):
+                return target
+        for target in KNIGHT_TARGETS[square_name]:
+            if holds(target, (utils.PieceType.KNIGHT,)):
+                return target
+
+        best_square: Optional[str] = None
+        best_value = INFINITY
+        for slider, rays in (
+            (utils.PieceType.BISHOP, BISHOP_RAYS[square_name]),
+            (utils.PieceType.ROOK, ROOK_RAYS[square_name]),
+        ):
+            for ray in rays:
+                for target in ray:
+                    if self.__board[target] is None or target in removed:
+                        continue
+                    if holds(target, SLIDER_TYPES[slider]):
+                        value = PIECE_VALUES[self.__board[target].piece_type]
+                        if value < best_value:
+                            best_square, best_value = target, value
+                    break
+        if best_square:
+            return best_square
+
+        for target in KING_TARGETS[square_name]:
+            if holds(target, (utils.PieceType.KING,)):
+                return target
+
+        return None
+
+    def make_move(self, move: Move) -> Optional[pieces.Piece]:
+        """play `move` for the side to move, returns the captured piece if any"""
+        source_sq, dest_sq = move
+        piece = self.__board[source_sq]
+        captured_piece = self.__board[dest_sq]
+
+        self.key ^= ZOBRIST_PIECE_KEYS[(source_sq, piece.color, piece.piece_type)]
+        self.key ^= ZOBRIST_PIECE_KEYS[(dest_sq, piece.color, piece.piece_type)]
+        if captured_piece:
+            self.key ^= ZOBRIST_PIECE_KEYS[
+                (dest_sq, captured_piece.color, captured_piece.piece_type)
+            ]
+
+        if self.accumulator:
+            self.accumulator.push(piece, source_sq, dest_sq, captured_piece)
+
+        self.__board[dest_sq] = piece
+        self.__board[source_sq] = None
+        self.__history.append((move, captured_piece))
+        self.switch_turn()
+
+        return captured_piece
+
+    def unmake_move(self) -> None:
+        """take back the last move made by `make_move`"""
+        (source_sq, dest_sq), captured_piece = self.__history.pop()
+        self.switch_turn()
+        piece = self.__board[dest_sq]
+
+        self.key ^= ZOBRIST_PIECE_KEYS[(dest_sq, piece.color, piece.piece_type)]
+        self.key ^= ZOBRIST_PIECE_KEYS[(source_sq, piece.color, piece.piece_type)]
+        if captured_piece:
+            self.key ^= ZOBRIST_PIECE_KEYS[
+                (dest_sq, captured_piece.color, captured_piece.piece_type)
+            ]
+
+        self.__board[source_sq] = piece
+        self.__board[dest_sq] = captured_piece
+
+        if self.accumulator:
+            self.accumulator.pop()
+
+    def last_move(self) -> Optional[Move]:
+        """the last move made by `make_move`, if any"""
+        return self.__history[-1][0] if self.__history else None
+
+    def last_move_captured_king(self) -> bool:
+        """in this game capturing the king ends it, see `Game.move_piece_from_source_to_dest`"""
+        if not self.__history:
+            return False
+        captured_piece = self.__history[-1][1]
+        return captured_piece is not None and captured_piece.piece_type == utils.PieceType.KING
+
+
+def evaluate(position: Position) -> int:
+    """static evaluation in centipawns, from the point of view of the side to move"""
+    turn = position.get_turn()
+    score = 0
+
+    for square_name, piece in position.get_board().items():
+        if piece is None:
+            continue
+
+        value = PIECE_VALUES[piece.piece_type]
+        if piece.piece_type == utils.PieceType.PAWN:
+            # black pawns walk up from rank 2, white pawns walk down from rank 7
+            rank = int(square_name[1:])
+            value += 10 * (
+                rank - utils.Rank_2
+                if piece.color == utils.Color.BLACK
+                else utils.Rank_7 - rank
+            )
+        elif piece.piece_type in (utils.PieceType.KNIGHT, utils.PieceType.BISHOP):
+            value += 5 * (7 - CENTER_DISTANCE[square_name])
+
+        score += value if piece.color == turn else -value
+
+    return score
+
+
+def static_exchange_evaluation(position: Position, move: Move) -> int:
+    """
+    Material balance of the whole exchange started by the capture `move`,
+    assuming both sides keep recapturing with their least valuable attacker
+    and may stop whenever continuing would lose material.
+    """
+    board = position.get_board()
+    source_sq, dest_sq = move
+    target_piece = board[dest_sq]
+
+    gains = [PIECE_VALUES[target_piece.piece_type] if target_piece else 0]
+    removed = {source_sq}
+    piece_on_dest_value = PIECE_VALUES[board[source_sq].piece_type]
+    side = opponent_of(board[source_sq].color)
+
+    while attacker := position.least_valuable_attacker(dest_sq, side, removed):
+        # no early cut off here, it would only keep the sign right and
+        # quiescence orders captures by the exact value
+        gains.append(piece_on_dest_value - gains[-1])
+        removed.add(attacker)
+        piece_on_dest_value = PIECE_VALUES[board[attacker].piece_type]
+        side = opponent_of(side)
+
+    while len(gains) > 1:
+        gains[-2] = -max(-gains[-2], gains[-1])
+        gains.pop()
+
+    return gains[0]
+
+
+def is_mate_score(score: int) -> bool:
+    return abs(score) >= MATE_SCORE - MAX_PLY
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    """mate scores are stored as distance from the node, not from the search root"""
+    if is_mate_score(score):
+        return score + ply if score > 0 else score - ply
+    return score
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    """reverse of `score_to_tt` for a node `ply` plies from the current root"""
+    if is_mate_score(score):
+        return score - ply if score > 0 else score + ply
+    return score
+
+
+class TTFlag(Enum):
+    """bound type of a transposition table score"""
+
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+@dataclass
+class TTEntry:
+    key: int
+    depth: int
+    score: int
+    flag: TTFlag
+    best_move: Optional[Move]
+
+
+class TranspositionTable:
+    """zobrist key => search result, oldest entries are dropped when full"""
+
+    def __init__(self, max_entries: int = 1 << 18) -> None:
+        self.max_entries = max_entries
+        self.__entries: dict[int, TTEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        return self.__entries.get(key)
+
+    def store(self, entry: TTEntry) -> None:
+        existing = self.__entries.pop(entry.key, None)
+        if existing and existing.depth > entry.depth and entry.flag != TTFlag.EXACT:
+            # keep the deeper result, but refresh its age
+            entry = existing
+        elif len(self.__entries) >= self.max_entries:
+            del self.__entries[next(iter(self.__entries))]
+
+        self.__entries[entry.key] = entry
+
+    def clear(self) -> None:
+        self.__entries.clear()
+
+
+@dataclass
+class SearchResult:
+    best_move: Optional[Move] = None
+    score: int = 0
+    depth: int = 0
+    pv: list[Move] = field(default_factory=list)
+    nodes: int = 0
+    elapsed: float = 0.0
+
+
+class _SearchAborted(Exception):
+    pass
+
+
+# pondering has no depth limit of its own, it runs until stopped or hit
+PONDER_MAX_DEPTH = 64
+
+# margin for positional gains when delta pruning quiescence captures
+DELTA_MARGIN = 200
+
+
+class SearchEngine:
+    """
+    Iterative deepening alpha-beta search.
+    The transposition table and history table live as long as the engine,
+    so knowledge gathered for one move (or while pondering on the opponent's
+    time) is reused by the next search. Call `new_game` to forget it.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 4,
+        time_limit: float = 2.0,
+        evaluator: Optional[Callable[[Position], int]] = None,
+    ) -> None:
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        # hand written `evaluate` unless e.g a `nnue.NNUEEvaluator` is given,
+        # an evaluator with an `attach(position)` method is attached to each search root
+        self.evaluator = evaluator or evaluate
+        self.transposition_table = TranspositionTable()
+        self.history: dict[Move, int] = {}
+        self.ponder_hits = 0
+
+        self.__nodes = 0
+        self.__stop = threading.Event()
+        self.__deadline: Optional[float] = None
+        self.__depth_limit = max_depth
+        self.__node_limit = INFINITY
+        self.__result = SearchResult()
+
+        self.__ponder_thread: Optional[threading.Thread] = None
+        self.__ponder_key: Optional[int] = None
+
+    def new_game(self) -> None:
+        """forget everything learnt from previous searches"""
+        self.stop_pondering()
+        self.transposition_table.clear()
+        self.history.clear()
+
+    def search(
+        self,
+        position: Position,
+        max_depth: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+    ) -> SearchResult:
+        """
+        Find the best move for the side to move of `position`.
+        The search stops at `max_depth`, after `time_limit` seconds or after
+        visiting `max_nodes` nodes, whichever comes first.
+        """
+        max_depth = max_depth or self.max_depth
+        time_limit = time_limit or self.time_limit
+
+        if self.__ponder_thread and self.__ponder_key == position.key:
+            # ponder hit: the background search already works on this
+            # position, just give it the remaining budget and wait for it
+            self.ponder_hits += 1
+            if self.__result.depth >= max_depth:
+                self.stop_pondering()
+            else:
+                self.__depth_limit = max_depth
+                self.__deadline = time.monotonic() + time_limit
+                if max_nodes:
+                    self.__node_limit = self.__nodes + max_nodes
+                self.__join_ponder_thread()
+
+            if self.__result.best_move:
+                return self.__result
+
+        self.stop_pondering()
+        self.__depth_limit = max_depth
+        self.__deadline = time.monotonic() + time_limit
+        self.__node_limit = max_nodes or INFINITY
+
+        return self._iterative_deepening(position.copy())
+
+    def start_pondering(self, position: Position, predicted_move: Move) -> None:
+        """
+        Search the position after `predicted_move` in the background,
+        while the opponent is thinking about their move.
+        """
+        self.stop_pondering()
+
+        ponder_position = position.copy()
+        ponder_position.make_move(predicted_move)
+        self.__ponder_key = ponder_position.key
+        self.__depth_limit = PONDER_MAX_DEPTH
+        self.__deadline = None
+        self.__node_limit = INFINITY
+
+        self.__ponder_thread = threading.Thread(
+            target=self._iterative_deepening,
+            args=(ponder_position,),
+            name="ponder",
+            daemon=True,
+        )
+        self.__ponder_thread.start()
+
+    def stop_pondering(self) -> None:
+        """abort the background search, if any"""
+        if self.__ponder_thread is None:
+            return
+
+        self.__stop.set()
+        self.__join_ponder_thread()
+        self.__stop.clear()
+
+    def __join_ponder_thread(self) -> None:
+        """wait for the background search to finish and forget it"""
+        self.__ponder_thread.join()
+        self.__ponder_thread = None
+        self.__ponder_key = None
+
+    def is_pondering(self) -> bool:
+        return self.__ponder_thread is not None
+
+    def evaluate(self, position: Position) -> int:
+        return self.evaluator(position)
+
+    def principal_variation(self, position: Position, max_length: int) -> list[Move]:
+        """follow best moves stored in the transposition table"""
+        pv: list[Move] = []
+        seen: set[int] = set()
+
+        while len(pv) < max_length and position.key not in seen:
+            seen.add(position.key)
+            entry = self.transposition_table.probe(position.key)
+            if entry is None or entry.best_move is None:
+                break
+            if entry.best_move not in position.generate_moves():
+                break
+            pv.append(entry.best_move)
+            position.make_move(entry.best_move)
+
+        for _ in pv:
+            position.unmake_move()
+
+        return pv
+
+    def _iterative_deepening(self, position: Position) -> SearchResult:
+        started = time.monotonic()
+        base_ply = position.ply
+        self.__nodes = 0
+        self.__result = SearchResult()
+
+        # let an incremental evaluator (e.g `nnue.NNUEEvaluator`) set up its
+        # state on the root, so the whole tree is searched with updates only
+        if attach := getattr(self.evaluator, "attach", None):
+            attach(position)
+
+        # age the history table instead of resetting it
+        for move in self.history:
+            self.history[move] //= 2
+
+        depth = 1
+        while depth <= self.__depth_limit:
+            try:
+                score = self._negamax(position, depth, -INFINITY, INFINITY, 0)
+            except _SearchAborted:
+                while position.ply > base_ply:
+                    position.unmake_move()
+                break
+
+            pv = self.principal_variation(position, depth)
+            self.__result = SearchResult(
+                best_move=pv[0] if pv else None,
+                score=score,
+                depth=depth,
+                pv=pv,
+                nodes=self.__nodes,
+                elapsed=time.monotonic() - started,
+            )
+            if is_mate_score(score):
+                break
+            depth += 1
+
+        if self.__result.best_move is None:
+            moves = position.generate_moves()
+            self.__result.best_move = moves[0] if moves else None
+            self.__result.pv = moves[:1]
+
+        self.__result.nodes = self.__nodes
+        self.__result.elapsed = time.monotonic() - started
+        return self.__result
+
+    def __count_node(self) -> None:
+        self.__nodes += 1
+        if self.__nodes >= self.__node_limit:
+            raise _SearchAborted()
+        if self.__nodes & 1023 == 0:
+            self.__check_time()
+
+    def __check_time(self) -> None:
+        if self.__stop.is_set() or (
+            self.__deadline is not None and time.monotonic() > self.__deadline
+        ):
+            raise _SearchAborted()
+
+    def _negamax(
+        self, position: Position, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        if depth <= 0:
+            # quiescence counts this node itself
+            return self._quiescence(position, alpha, beta, ply)
+
+        self.__count_node()
+        if position.last_move_captured_king():
+            return -MATE_SCORE + ply
+
+        original_alpha = alpha
+        tt_move: Optional[Move] = None
+        if entry := self.transposition_table.probe(position.key):
+            tt_move = entry.best_move
+            tt_score = score_from_tt(entry.score, ply)
+            if ply > 0 and entry.depth >= depth:
+                if entry.flag == TTFlag.EXACT:
+                    return tt_score
+                if entry.flag == TTFlag.LOWER:
+                    alpha = max(alpha, tt_score)
+                elif entry.flag == TTFlag.UPPER:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+
+        moves = self._order_moves(position, position.generate_moves(), tt_move)
+        if not moves:
+            return 0
+
+        best_score = -INFINITY
+        best_move: Optional[Move] = None
+        for move in moves:
+            captured_piece = position.make_move(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if captured_piece is None:
+                    self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = TTFlag.UPPER
+        elif best_score >= beta:
+            flag = TTFlag.LOWER
+        else:
+            flag = TTFlag.EXACT
+        self.transposition_table.store(
+            TTEntry(position.key, depth, score_to_tt(best_score, ply), flag, best_move)
+        )
+
+        return best_score
+
+    def _quiescence(self, position: Position, alpha: int, beta: int, ply: int) -> int:
+        """
+        Resolve captures until the position is quiet, so the horizon never
+        falls in the middle of an exchange.
+        Captures losing material (SEE < 0) and captures which can not bring
+        the score back up to `alpha` (delta pruning) are skipped.
+        """
+        self.__count_node()
+
+        if position.last_move_captured_king():
+            return -MATE_SCORE + ply
+
+        best_score = self.evaluate(position)
+        if best_score >= beta:
+            return best_score
+        alpha = max(alpha, best_score)
+
+        board = position.get_board()
+        scored_captures: list[tuple[int, Move]] = []
+        for move in position.generate_captures():
+            captured_piece = board[move[1]]
+            if (
+                captured_piece.piece_type != utils.PieceType.KING
+                and best_score + PIECE_VALUES[captured_piece.piece_type] + DELTA_MARGIN
+                <= alpha
+            ):
+                continue
+            exchange_score = static_exchange_evaluation(position, move)
+            if exchange_score < 0:
+                continue
+            scored_captures.append((exchange_score, move))
+
+        scored_captures.sort(key=lambda item: item[0], reverse=True)
+        for _, move in scored_captures:
+            position.make_move(move)
+            score = -self._quiescence(position, -beta, -alpha, ply + 1)
+            position.unmake_move()
+
+            if score > best_score:
+                best_score = score
+            if score >= beta:
+                break
+            alpha = max(alpha, score)
+
+        return best_score
+
+    def _order_moves(
+        self, position: Position, moves: list[Move], tt_move: Optional[Move]
+    ) -> list[Move]:
+        """transposition table move, then captures (MVV-LVA), then history"""
+        board = position.get_board()
+
+        def move_order(move: Move) -> int:
+            if move == tt_move:
+                return 1 << 30
+            if captured_piece := board[move[1]]:
+                return (1 << 24) + PIECE_VALUES[captured_piece.piece_type] * 8 - (
+                    PIECE_VALUES[board[move[0]].piece_type] // 100
+                )
+            return min(self.history.get(move, 0), (1 << 24) - 1)
+
+        return sorted(moves, key=move_order, reverse=True)
@@ -0,0 +1,233 @@
+import random
+import unittest
+import engine
+import pieces
+import utils
+
+
+def create_position(placements, turn=utils.Color.BLACK):
+    board = {
+        square_name: piece_class(color=color)
+        for square_name, (piece_class, color) in placements.items()
+    }
+    return engine.Position(board, turn)
+
+
+class TestPosition(unittest.TestCase):
+    def setUp(self) -> None:
+        self.position = create_position(
+            {
+                "E1": (pieces.PieceKing, utils.Color.BLACK),
+                "D4": (pieces.PieceRook, utils.Color.BLACK),
+                "D7": (pieces.PieceQueen, utils.Color.WHITE),
+                "E8": (pieces.PieceKing, utils.Color.WHITE),
+            }
+        )
+
+    def test_make_unmake_restores_key(self):
+        key = self.position.key
+        self.position.make_move(("D4", "D7"))
+        self.assertNotEqual(self.position.key, key)
+        self.assertEqual(self.position.get_turn(), utils.Color.WHITE)
+
+        self.position.unmake_move()
+        self.assertEqual(self.position.key, key)
+        self.assertEqual(self.position.get_board()["D7"].piece_type, utils.PieceType.QUEEN)
+
+    def test_key_matches_fresh_position(self):
+        self.position.make_move(("D4", "D7"))
+        self.assertEqual(self.position.key, self.position.copy().key)
+
+
+class TestSearchEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = engine.SearchEngine(max_depth=3, time_limit=10)
+        self.position = create_position(
+            {
+                "E1": (pieces.PieceKing, utils.Color.BLACK),
+                "D4": (pieces.PieceRook, utils.Color.BLACK),
+                "D7": (pieces.PieceQueen, utils.Color.WHITE),
+                "H8": (pieces.PieceKing, utils.Color.WHITE),
+            }
+        )
+
+    def test_search_wins_material(self):
+        result = self.engine.search(self.position)
+        self.assertEqual(result.best_move, ("D4", "D7"))
+        self.assertGreater(result.score, 0)
+
+    def test_tables_are_kept_between_searches(self):
+        first = self.engine.search(self.position)
+        self.assertGreater(len(self.engine.transposition_table), 0)
+
+        second = self.engine.search(self.position)
+        self.assertEqual(second.best_move, first.best_move)
+        self.assertLess(second.nodes, first.nodes)
+
+        self.engine.new_game()
+        self.assertEqual(len(self.engine.transposition_table), 0)
+
+    def test_node_budget(self):
+        result = self.engine.search(self.position, max_depth=1)
+        # the root and one node per move, each horizon node counted once
+        self.assertEqual(result.nodes, 1 + len(self.position.generate_moves()))
+
+        self.engine.new_game()
+        result = self.engine.search(self.position, max_depth=10, max_nodes=300)
+        self.assertLessEqual(result.nodes, 300)
+
+    def test_ponder_hit(self):
+        self.position.switch_turn()
+        self.engine.start_pondering(self.position, ("H8", "H7"))
+        self.assertTrue(self.engine.is_pondering())
+
+        self.position.make_move(("H8", "H7"))
+        result = self.engine.search(self.position)
+        self.assertEqual(self.engine.ponder_hits, 1)
+        self.assertFalse(self.engine.is_pondering())
+        self.assertEqual(result.best_move, ("D4", "D7"))
+
+    def test_ponder_miss(self):
+        self.position.switch_turn()
+        self.engine.start_pondering(self.position, ("H8", "G8"))
+
+        self.position.make_move(("H8", "H7"))
+        result = self.engine.search(self.position)
+        self.assertEqual(self.engine.ponder_hits, 0)
+        self.assertEqual(result.best_move, ("D4", "D7"))
+
+
+class TestMateScores(unittest.TestCase):
+    def test_tt_scores_are_relative_to_the_node(self):
+        score = -engine.MATE_SCORE + 5
+        stored = engine.score_to_tt(score, 2)
+        self.assertEqual(stored, -engine.MATE_SCORE + 3)
+        self.assertEqual(engine.score_from_tt(stored, 4), -engine.MATE_SCORE + 7)
+        self.assertEqual(engine.score_from_tt(engine.score_to_tt(150, 2), 4), 150)
+
+    def test_mate_distance_after_reusing_table(self):
+        position = create_position(
+            {
+                "F2": (pieces.PieceKing, utils.Color.BLACK),
+                "C3": (pieces.PieceRook, utils.Color.BLACK),
+                "E8": (pieces.PieceQueen, utils.Color.BLACK),
+                "G4": (pieces.PieceQueen, utils.Color.BLACK),
+                "A1": (pieces.PieceKing, utils.Color.WHITE),
+            }
+        )
+        search_engine = engine.SearchEngine(max_depth=4, time_limit=10)
+        search_engine.search(position)
+
+        # two plies later, the table holds mate scores stored by the first search
+        position.make_move(("C3", "B3"))
+        position.make_move(("A1", "A2"))
+        warm = search_engine.search(position, max_depth=2)
+        cold = engine.SearchEngine(max_depth=2, time_limit=10).search(position)
+        self.assertEqual(warm.score, cold.score)
+        self.assertEqual(warm.score, engine.MATE_SCORE - 3)
+
+
+def brute_force_exchange(position, move):
+    """the exchange on the destination square, searched recursively"""
+    board = position.get_board()
+    source_sq, dest_sq = move
+
+    def gain(side, removed, piece_on_dest_value):
+        attacker = position.least_valuable_attacker(dest_sq, side, removed)
+        if attacker is None:
+            return 0
+        return max(
+            0,
+            piece_on_dest_value
+            - gain(
+                engine.opponent_of(side),
+                removed | {attacker},
+                engine.PIECE_VALUES[board[attacker].piece_type],
+            ),
+        )
+
+    return engine.PIECE_VALUES[board[dest_sq].piece_type] - gain(
+        engine.opponent_of(board[source_sq].color),
+        {source_sq},
+        engine.PIECE_VALUES[board[source_sq].piece_type],
+    )
+
+
+class TestStaticExchangeEvaluation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.placements = {
+            "A1": (pieces.PieceKing, utils.Color.BLACK),
+            "D4": (pieces.PieceRook, utils.Color.BLACK),
+            "D7": (pieces.PiecePawn, utils.Color.WHITE),
+            "H8": (pieces.PieceKing, utils.Color.WHITE),
+        }
+
+    def test_undefended_capture(self):
+        position = create_position(self.placements)
+        self.assertEqual(engine.static_exchange_evaluation(position, ("D4", "D7")), 100)
+
+    def test_defended_capture(self):
+        self.placements["D8"] = (pieces.PieceRook, utils.Color.WHITE)
+        position = create_position(self.placements)
+        self.assertEqual(engine.static_exchange_evaluation(position, ("D4", "D7")), -400)
+
+    def test_x_ray_attacker(self):
+        self.placements["D8"] = (pieces.PieceRook, utils.Color.WHITE)
+        self.placements["D3"] = (pieces.PieceRook, utils.Color.BLACK)
+        position = create_position(self.placements)
+        self.assertEqual(engine.static_exchange_evaluation(position, ("D4", "D7")), 100)
+
+    def test_recapture_backed_up_by_second_attacker(self):
+        position = create_position(
+            {
+                "H1": (pieces.PieceKing, utils.Color.BLACK),
+                "A1": (pieces.PieceRook, utils.Color.BLACK),
+                "A7": (pieces.PieceRook, utils.Color.BLACK),
+                "A6": (pieces.PieceQueen, utils.Color.WHITE),
+                "F6": (pieces.PieceRook, utils.Color.WHITE),
+                "H8": (pieces.PieceKing, utils.Color.WHITE),
+            }
+        )
+        self.assertEqual(engine.static_exchange_evaluation(position, ("A1", "A6")), 900)
+
+    def test_matches_brute_force_exchange(self):
+        rng = random.Random(7)
+        piece_classes = list(pieces.PIECE_CLASSES.values())
+        checked = 0
+        for _ in range(300):
+            squares = rng.sample(engine.SQUARE_NAMES, 12)
+            board = {
+                square_name: rng.choice(piece_classes)(
+                    color=rng.choice([utils.Color.BLACK, utils.Color.WHITE])
+                )
+                for square_name in squares
+            }
+            position = engine.Position(board, utils.Color.BLACK)
+            for move in position.generate_captures():
+                checked += 1
+                self.assertEqual(
+                    engine.static_exchange_evaluation(position, move),
+                    brute_force_exchange(position, move),
+                    move,
+                )
+        self.assertGreater(checked, 500)
+
+    def test_generate_captures(self):
+        self.placements["D8"] = (pieces.PieceRook, utils.Color.WHITE)
+        position = create_position(self.placements)
+        self.assertEqual(position.generate_captures(), [("D4", "D7")])
+
+        position.switch_turn()
+        self.assertEqual(position.generate_captures(), [])
+
+    def test_quiescence_sees_recapture(self):
+        self.placements["D4"] = (pieces.PieceQueen, utils.Color.BLACK)
+        self.placements["D8"] = (pieces.PieceRook, utils.Color.WHITE)
+        position = create_position(self.placements)
+
+        result = engine.SearchEngine(max_depth=1, time_limit=10).search(position)
+        self.assertNotEqual(result.best_move, ("D4", "D7"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,24 @@
 import sys
 import utils
 import pieces
-import board
+import engine
+import notation
 from game_types import GameInterface
-from typing import Optional, Any
+from typing import TYPE_CHECKING, Optional, Any
+
+if TYPE_CHECKING:
+    # only the UI needs pygame, a game can be loaded and searched without it
+    import board
 
 
 class Game(GameInterface):
     """Game holds logic of chess game"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        search_engine: Optional[engine.SearchEngine] = None,
+        engine_color: utils.Color = utils.Color.WHITE,
+    ):
         self.__board: dict[str, Optional[pieces.Piece]] = {}
         self.__screen = None
 
@@ -26,7 +35,11 @@ class Game(GameInterface):
             utils.Color.WHITE: [],
         }
 
-    def set_screen(self, screen: board.GameRenderer):
+        # when set, `search_engine` plays `engine_color` against the user
+        self.__engine = search_engine
+        self.__engine_color = engine_color
+
+    def set_screen(self, screen: "board.GameRenderer"):
         """set display screen for the game"""
         self.__screen = screen
 
@@ -36,6 +49,10 @@ class Game(GameInterface):
             utils.Color.BLACK if self.__turn == utils.Color.WHITE else utils.Color.WHITE
         )
 
+    def get_turn(self) -> utils.Color:
+        """getter for the color which can move"""
+        return self.__turn
+
     def __init_board(self) -> None:
         for rank in utils.RANKS:
             for file in utils.FILES:
@@ -44,41 +61,33 @@ class Game(GameInterface):
 
     def re_organize_board(self) -> None:
         """Place pieces in their initial places for a new game"""
-        piece_classes = [
-            pieces.PieceRook,
-            pieces.PieceKnight,
-            pieces.PieceBishop,
-            pieces.PieceQueen,
-            pieces.PieceKing,
-            pieces.PieceBishop,
-            pieces.PieceKnight,
-            pieces.PieceRook,
-        ]
-        for index, file in enumerate(utils.FILES):
-            for item in [
-                (utils.Color.BLACK, utils.Rank_2),
-                (utils.Color.WHITE, utils.Rank_7),
-            ]:
-                piece = pieces.PiecePawn(color=item[0])
-                square_name = utils.create_square_name(file, item[1])
-
-                self.__board[square_name] = piece
-                self.__screen.draw_piece_on_square(
-                    square_name, piece_name=piece.__str__()
-                )
+        for square_name, piece in pieces.create_initial_board().items():
+            self.__board[square_name] = piece
+            self.__screen.draw_piece_on_square(square_name, piece_name=piece.__str__())
 
-            piece_class = piece_classes[index]
-            for item in [
-                (utils.Color.BLACK, utils.Rank_1),
-                (utils.Color.WHITE, utils.Rank_8),
-            ]:
-                piece = piece_class(color=item[0])
-                square_name = utils.create_square_name(file, item[1])
-
-                self.__board[square_name] = piece
-                self.__screen.draw_piece_on_square(
-                    square_name, piece_name=piece.__str__()
+    def load_fen(self, fen: str) -> None:
+        """
+        Replace the game state by the position of a FEN string.
+        Raises `ValueError` if `fen` is invalid.
+        """
+        board_pieces, turn = notation.parse_fen(fen)
+
+        self.__init_board()
+        self.__board.update(board_pieces)
+        self.__turn = turn
+        self.__winner = None
+        self.__active_square = None
+        self.__available_moves = set()
+        for captures in self.__captures_data.values():
+            captures.clear()
+
+        if self.__screen:
+            for square_name, piece in self.__board.items():
+                self.__screen.set_color_on_square(
+                    square_name, utils.SQUARES_COLOR_MAP[square_name]
                 )
+                if piece:
+                    self.__screen.draw_piece_on_square(square_name, piece.__str__())
 
     def get_board(self) -> dict[str, Optional[Any]]:
         """getter for accessing game board state"""
@@ -154,6 +163,7 @@ class Game(GameInterface):
                 )
                 self.__active_square = None
                 self.switch_turn()
+                self.play_engine_move()
             else:
                 # means user discards move
                 self.__active_square = None
@@ -174,6 +184,26 @@ class Game(GameInterface):
                         square_name, piece_on_square.__str__()
                     )
 
+    def play_engine_move(self) -> None:
+        """
+        If it is the engine's turn, search and play its move.
+        Then keep the engine thinking on the expected reply while the user thinks.
+        """
+        if self.__engine is None or self.__turn != self.__engine_color:
+            return
+
+        position = engine.Position.from_game(self)
+        result = self.__engine.search(position)
+        if result.best_move is None:
+            return
+
+        self.move_piece_from_source_to_dest(*result.best_move)
+        self.switch_turn()
+
+        if len(result.pv) > 1:
+            position.make_move(result.best_move)
+            self.__engine.start_pondering(position, result.pv[1])
+
     def event_handler(self, event: utils.GameEvent):
         """event listener for game events"""
         if event.event_type == utils.GameEventType.QUIT:
@@ -191,9 +221,12 @@ class Game(GameInterface):
         self.__screen.setup()  # this must go first
         self.__init_board()
         self.re_organize_board()
+        self.play_engine_move()
         self.__screen.render()
 
     def __close(self):
+        if self.__engine:
+            self.__engine.stop_pondering()
         self.__board.clear()
         self.__captures_data.clear()
         self.__screen.close()
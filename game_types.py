@@ -9,6 +9,10 @@ class GameInterface(ABC):
     def switch_turn(self) -> None:
         pass
 
+    @abstractmethod
+    def get_turn(self) -> Any:
+        pass
+
     @abstractmethod
     def get_board(self) -> dict[str, Optional[Any]]:
         pass
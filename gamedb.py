@@ -0,0 +1,428 @@
+"""
+Indexed binary game database built from PGN.
+
+A database is a directory of flat native-endian arrays, memory mapped on open:
+
+- `moves.bin`: every game's moves packed as uint16, game after game
+- `offsets.bin`: uint64 start of each game in `moves.bin`, plus the end
+- `results.bin`: uint8 result of each game, see `RESULTS`
+- `headers.jsonl` / `header_offsets.bin`: PGN headers, one JSON line per game
+- `keys.bin` / `key_games.bin` / `key_plies.bin`: sorted zobrist keys of every
+  position reached, with the uint32 game and uint16 ply reaching it
+
+    python3 gamedb.py build games.pgn games_db
+    python3 gamedb.py query games_db "<FEN>"
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import mmap
+import os
+import re
+import tempfile
+from array import array
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, Optional
+
+import engine
+import notation
+import utils
+
+RESULTS = ["*", "1-0", "0-1", "1/2-1/2"]
+
+SQUARE_INDEX = {
+    square_name: index for index, square_name in enumerate(engine.SQUARE_NAMES)
+}
+
+# postings are sorted in chunks of this size, then merged from disk
+POSTINGS_CHUNK_SIZE = 1 << 20
+# runs merged at once, reading blocks of POSTINGS_BLOCK_SIZE bytes from each,
+# more runs are merged in passes
+POSTINGS_MERGE_FAN_IN = 32
+POSTINGS_BLOCK_SIZE = 1 << 16
+
+COMMENT_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*")
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+HEADER_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+
+
+def pack_move(move: engine.Move, promotion: Optional[utils.PieceType] = None) -> int:
+    """source square (6 bits), destination square (6 bits), promotion piece type (3 bits)"""
+    return (
+        SQUARE_INDEX[move[0]]
+        | SQUARE_INDEX[move[1]] << 6
+        | (promotion.value if promotion else 0) << 12
+    )
+
+
+def unpack_move(packed_move: int) -> tuple[engine.Move, Optional[utils.PieceType]]:
+    promotion = packed_move >> 12
+    return (
+        engine.SQUARE_NAMES[packed_move & 63],
+        engine.SQUARE_NAMES[packed_move >> 6 & 63],
+    ), (utils.PieceType(promotion) if promotion else None)
+
+
+@dataclass
+class PgnGame:
+    headers: dict[str, str] = field(default_factory=dict)
+    sans: list[str] = field(default_factory=list)
+
+
+def _strip_variations(text: str) -> str:
+    depth = 0
+    kept: list[str] = []
+    for character in text:
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            kept.append(character)
+    return "".join(kept)
+
+
+def read_pgn_games(stream: IO[str]) -> Iterator[PgnGame]:
+    """games of a PGN file one by one, comments, variations and NAGs are dropped"""
+    game = PgnGame()
+    movetext: list[str] = []
+
+    def finish() -> PgnGame:
+        text = _strip_variations(COMMENT_PATTERN.sub(" ", " ".join(movetext)))
+        for token in text.split():
+            token = MOVE_NUMBER_PATTERN.sub("", token)
+            if token and not token.startswith("$") and token not in RESULTS:
+                game.sans.append(token)
+        return game
+
+    for line in stream:
+        line = line.strip()
+        if match := HEADER_PATTERN.match(line):
+            if movetext:
+                yield finish()
+                game, movetext = PgnGame(), []
+            game.headers[match[1]] = match[2]
+        elif line and not line.startswith("%"):
+            movetext.append(line)
+
+    if movetext or game.headers:
+        yield finish()
+
+
+def start_position(headers: dict[str, str]) -> engine.Position:
+    return notation.position_from_fen(headers.get("FEN", notation.STANDARD_START_FEN))
+
+
+class _PostingsWriter:
+    """
+    collects (key, game, ply) postings, spilling sorted runs to temp files.
+    A posting is buffered as two 8 byte array items, and sorted as one
+    `key << 48 | game << 16 | ply` int only while it is spilled.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.__directory = directory
+        self.__keys = array("Q")
+        self.__game_plies = array("Q")
+        self.__runs: list[str] = []
+
+    def add(self, key: int, game_index: int, ply: int) -> None:
+        self.__keys.append(key)
+        self.__game_plies.append(game_index << 16 | ply)
+        if len(self.__keys) >= POSTINGS_CHUNK_SIZE:
+            self.__spill()
+
+    def __spill(self) -> None:
+        packed = sorted(
+            key << 48 | game_ply
+            for key, game_ply in zip(self.__keys, self.__game_plies)
+        )
+        self.__keys, self.__game_plies = array("Q"), array("Q")
+
+        flat = array("Q", bytes(16 * len(packed)))
+        flat[::2] = array("Q", (posting >> 48 for posting in packed))
+        flat[1::2] = array("Q", (posting & (1 << 48) - 1 for posting in packed))
+        del packed
+
+        handle, path = tempfile.mkstemp(suffix=".run", dir=self.__directory)
+        with os.fdopen(handle, "wb") as run_file:
+            flat.tofile(run_file)
+        self.__runs.append(path)
+
+    def __read_run(self, path: str) -> Iterator[tuple[int, int]]:
+        with open(path, "rb") as run_file:
+            while block := run_file.read(POSTINGS_BLOCK_SIZE):
+                flat = iter(array("Q", block))
+                yield from zip(flat, flat)
+
+    def __merge_runs(self, paths: list[str]) -> str:
+        """merge sorted runs into a new one, the merged runs are removed"""
+        handle, path = tempfile.mkstemp(suffix=".run", dir=self.__directory)
+        with os.fdopen(handle, "wb") as run_file:
+            flat = array("Q")
+            for posting in heapq.merge(*(self.__read_run(path) for path in paths)):
+                flat.extend(posting)
+                if len(flat) * flat.itemsize >= POSTINGS_BLOCK_SIZE:
+                    flat.tofile(run_file)
+                    flat = array("Q")
+            flat.tofile(run_file)
+
+        for merged_path in paths:
+            os.remove(merged_path)
+        return path
+
+    def write(self, directory: str) -> None:
+        if self.__keys:
+            self.__spill()
+        while len(self.__runs) > POSTINGS_MERGE_FAN_IN:
+            self.__runs = [
+                self.__merge_runs(self.__runs[start : start + POSTINGS_MERGE_FAN_IN])
+                for start in range(0, len(self.__runs), POSTINGS_MERGE_FAN_IN)
+            ]
+        merged = heapq.merge(*(self.__read_run(path) for path in self.__runs))
+
+        with open(os.path.join(directory, "keys.bin"), "wb") as keys_file, open(
+            os.path.join(directory, "key_games.bin"), "wb"
+        ) as games_file, open(
+            os.path.join(directory, "key_plies.bin"), "wb"
+        ) as plies_file:
+            keys, games, plies = array("Q"), array("I"), array("H")
+            for key, game_ply in merged:
+                keys.append(key)
+                games.append(game_ply >> 16)
+                plies.append(game_ply & 0xFFFF)
+                if len(keys) >= POSTINGS_CHUNK_SIZE:
+                    keys.tofile(keys_file)
+                    games.tofile(games_file)
+                    plies.tofile(plies_file)
+                    keys, games, plies = array("Q"), array("I"), array("H")
+            keys.tofile(keys_file)
+            games.tofile(games_file)
+            plies.tofile(plies_file)
+
+        for path in self.__runs:
+            os.remove(path)
+
+
+def build_database(games: Iterable[PgnGame], directory: str) -> tuple[int, int]:
+    """
+    Write the database of `games` to `directory`.
+    Returns `(stored games, skipped games)`, games with an illegal or
+    unreadable move are skipped as a whole.
+    """
+    os.makedirs(directory, exist_ok=True)
+    postings = _PostingsWriter(directory)
+    offsets = array("Q", [0])
+    results = array("B")
+    header_offsets = array("Q", [0])
+    skipped = 0
+
+    with open(os.path.join(directory, "moves.bin"), "wb") as moves_file, open(
+        os.path.join(directory, "headers.jsonl"), "wb"
+    ) as headers_file:
+        for game in games:
+            try:
+                position = start_position(game.headers)
+                keys = [position.key]
+                moves = array("H")
+                for san in game.sans:
+                    move, promotion = notation.parse_san(position, san)
+                    notation.make_standard_move(position, move, promotion)
+                    moves.append(pack_move(move, promotion))
+                    keys.append(position.key)
+            except ValueError:
+                # an illegal or unreadable move, see `notation.parse_san`
+                skipped += 1
+                continue
+
+            game_index = len(results)
+            seen_keys: set[int] = set()
+            for ply, key in enumerate(keys):
+                # a repeated position is only posted at its first ply, so a
+                # game is found and counted once
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    postings.add(key, game_index, ply)
+
+            moves.tofile(moves_file)
+            offsets.append(offsets[-1] + len(moves))
+            result = game.headers.get("Result", "*")
+            results.append(RESULTS.index(result) if result in RESULTS else 0)
+
+            header_line = (json.dumps(game.headers) + "\n").encode()
+            headers_file.write(header_line)
+            header_offsets.append(header_offsets[-1] + len(header_line))
+
+    for name, values in [
+        ("offsets.bin", offsets),
+        ("results.bin", results),
+        ("header_offsets.bin", header_offsets),
+    ]:
+        with open(os.path.join(directory, name), "wb") as array_file:
+            values.tofile(array_file)
+    postings.write(directory)
+
+    return len(results), skipped
+
+
+@dataclass
+class MoveStatistics:
+    """how often a move was played from a position, and how those games ended"""
+
+    move: str  # coordinate notation, e.g "e2e4"
+    games: int = 0
+    white_wins: int = 0
+    draws: int = 0
+    black_wins: int = 0
+
+
+class GameDatabase:
+    """read access to a directory written by `build_database`"""
+
+    def __init__(self, directory: str) -> None:
+        self.__mmaps: list[mmap.mmap] = []
+        self.__views: list[memoryview] = []
+        self.__moves = self.__map(directory, "moves.bin", "H")
+        self.__offsets = self.__map(directory, "offsets.bin", "Q")
+        self.__results = self.__map(directory, "results.bin", "B")
+        self.__headers = self.__map(directory, "headers.jsonl", "B")
+        self.__header_offsets = self.__map(directory, "header_offsets.bin", "Q")
+        self.__keys = self.__map(directory, "keys.bin", "Q")
+        self.__key_games = self.__map(directory, "key_games.bin", "I")
+        self.__key_plies = self.__map(directory, "key_plies.bin", "H")
+
+    def __map(self, directory: str, name: str, type_code: str) -> memoryview:
+        with open(os.path.join(directory, name), "rb") as array_file:
+            if os.fstat(array_file.fileno()).st_size == 0:
+                # empty files can not be memory mapped
+                return memoryview(b"").cast(type_code)
+            mapped = mmap.mmap(array_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.__mmaps.append(mapped)
+        raw_view = memoryview(mapped)
+        view = raw_view.cast(type_code)
+        self.__views += [view, raw_view]
+        return view
+
+    def close(self) -> None:
+        # views must be released before their memory maps can be closed
+        for view in self.__views:
+            view.release()
+        for mapped in self.__mmaps:
+            mapped.close()
+        self.__views.clear()
+        self.__mmaps.clear()
+
+    def __enter__(self) -> "GameDatabase":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.__results)
+
+    def game_headers(self, game_index: int) -> dict[str, str]:
+        start = self.__header_offsets[game_index]
+        end = self.__header_offsets[game_index + 1]
+        return json.loads(bytes(self.__headers[start:end]))
+
+    def game_result(self, game_index: int) -> str:
+        return RESULTS[self.__results[game_index]]
+
+    def game_moves(
+        self, game_index: int
+    ) -> list[tuple[engine.Move, Optional[utils.PieceType]]]:
+        start = self.__offsets[game_index]
+        end = self.__offsets[game_index + 1]
+        return [unpack_move(packed_move) for packed_move in self.__moves[start:end]]
+
+    def game_position(self, game_index: int, ply: int) -> engine.Position:
+        """replay a game up to `ply`"""
+        position = start_position(self.game_headers(game_index))
+        for move, promotion in self.game_moves(game_index)[:ply]:
+            notation.make_standard_move(position, move, promotion)
+        return position
+
+    def find_games_reaching(self, position: engine.Position) -> list[tuple[int, int]]:
+        """
+        `(game index, ply)` of every game reaching `position`, by game index,
+        with the ply the game first reached it
+        """
+        start = bisect.bisect_left(self.__keys, position.key)
+        end = bisect.bisect_right(self.__keys, position.key, lo=start)
+        return [
+            (self.__key_games[index], self.__key_plies[index])
+            for index in range(start, end)
+        ]
+
+    def opening_tree(self, position: engine.Position) -> list[MoveStatistics]:
+        """moves played from `position` with their results, most played first"""
+        statistics: dict[int, MoveStatistics] = {}
+
+        for game_index, ply in self.find_games_reaching(position):
+            move_index = self.__offsets[game_index] + ply
+            if move_index >= self.__offsets[game_index + 1]:
+                # the game ended in this position
+                continue
+
+            packed_move = self.__moves[move_index]
+            if packed_move not in statistics:
+                statistics[packed_move] = MoveStatistics(
+                    notation.move_to_standard(*unpack_move(packed_move))
+                )
+            move_statistics = statistics[packed_move]
+            move_statistics.games += 1
+            result = self.game_result(game_index)
+            if result == "1-0":
+                move_statistics.white_wins += 1
+            elif result == "0-1":
+                move_statistics.black_wins += 1
+            elif result == "1/2-1/2":
+                move_statistics.draws += 1
+
+        return sorted(statistics.values(), key=lambda item: item.games, reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="indexed PGN game database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="build a database from PGN files")
+    build_parser.add_argument("pgn", nargs="+")
+    build_parser.add_argument("directory")
+
+    query_parser = commands.add_parser("query", help="games and moves from a position")
+    query_parser.add_argument("directory")
+    query_parser.add_argument("fen", nargs="?", default=notation.STANDARD_START_FEN)
+    query_parser.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+
+        def read_all() -> Iterator[PgnGame]:
+            for path in args.pgn:
+                with open(path, encoding="utf-8", errors="replace") as pgn_file:
+                    yield from read_pgn_games(pgn_file)
+
+        stored, skipped = build_database(read_all(), args.directory)
+        print(f"stored {stored} games, skipped {skipped}")
+    else:
+        with GameDatabase(args.directory) as database:
+            position = notation.position_from_fen(args.fen)
+            hits = database.find_games_reaching(position)
+            print(f"{len(hits)} games reach this position")
+            for item in database.opening_tree(position):
+                print(
+                    f"{item.move}\t{item.games}\t"
+                    f"+{item.white_wins} ={item.draws} -{item.black_wins}"
+                )
+            for game_index, ply in hits[: args.limit]:
+                headers = database.game_headers(game_index)
+                print(
+                    f"#{game_index} ply {ply}: {headers.get('White', '?')} - "
+                    f"{headers.get('Black', '?')} {database.game_result(game_index)}"
+                )
@@ -0,0 +1,112 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import gamedb
+import notation
+
+PGN = """[Event "A"]
+[White "Alice"]
+[Black "Bob"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {a comment} Nc6 (2... d6 3. d4) 3. Bb5 a6 1-0
+
+[Event "B"]
+[Result "0-1"]
+
+1. e4 c5 2. Nf3 d6 $1 0-1
+
+[Event "C"]
+[Result "1/2-1/2"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. Zz9 1/2-1/2
+
+[Event "E"]
+[Result "*"]
+
+1. Nf3 e5 2. f4 *
+
+[Event "D"]
+[Result "1/2-1/2"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 1/2-1/2
+"""
+
+
+class TestGameDatabase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        games = gamedb.read_pgn_games(io.StringIO(PGN))
+        self.stored, self.skipped = gamedb.build_database(games, self.directory.name)
+        self.database = gamedb.GameDatabase(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_build(self):
+        self.assertEqual((self.stored, self.skipped), (3, 2))
+        self.assertEqual(len(self.database), 3)
+        self.assertEqual(self.database.game_headers(0)["White"], "Alice")
+        self.assertEqual(self.database.game_result(2), "1/2-1/2")
+        self.assertEqual(len(self.database.game_moves(0)), 6)
+
+    def test_find_games_reaching(self):
+        position = notation.position_from_fen(
+            "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w - - 0 1"
+        )
+        self.assertEqual(self.database.find_games_reaching(position), [(0, 4), (2, 4)])
+        self.assertEqual(self.database.game_position(2, 4).key, position.key)
+
+    def test_opening_tree(self):
+        position = notation.position_from_fen(notation.STANDARD_START_FEN)
+        position.make_move(notation.parse_san(position, "e4")[0])
+
+        tree = self.database.opening_tree(position)
+        self.assertEqual([item.move for item in tree], ["e7e5", "c7c5"])
+        self.assertEqual(
+            (tree[0].games, tree[0].white_wins, tree[0].draws, tree[0].black_wins),
+            (2, 1, 1, 0),
+        )
+
+    def test_repeated_position_counts_once(self):
+        pgn = """[Result "1/2-1/2"]
+
+1. Nf3 Nf6 2. Ng1 Ng8 3. Nf3 Nf6 4. Ng1 Ng8 1/2-1/2
+"""
+        with tempfile.TemporaryDirectory() as directory:
+            gamedb.build_database(gamedb.read_pgn_games(io.StringIO(pgn)), directory)
+            with gamedb.GameDatabase(directory) as database:
+                position = notation.position_from_fen(notation.STANDARD_START_FEN)
+                self.assertEqual(database.find_games_reaching(position), [(0, 0)])
+
+                tree = database.opening_tree(position)
+                self.assertEqual([item.move for item in tree], ["g1f3"])
+                self.assertEqual((tree[0].games, tree[0].draws), (1, 1))
+
+    def test_postings_spilled_in_runs(self):
+        # the second case merges its many runs in several passes
+        for chunk_size, fan_in in [(3, 32), (2, 2)]:
+            with self.subTest(
+                chunk_size=chunk_size, fan_in=fan_in
+            ), mock.patch.multiple(
+                gamedb, POSTINGS_CHUNK_SIZE=chunk_size, POSTINGS_MERGE_FAN_IN=fan_in
+            ), tempfile.TemporaryDirectory() as directory:
+                gamedb.build_database(
+                    gamedb.read_pgn_games(io.StringIO(PGN)), directory
+                )
+                for name in ("keys.bin", "key_games.bin", "key_plies.bin"):
+                    with open(os.path.join(directory, name), "rb") as spilled, open(
+                        os.path.join(self.directory.name, name), "rb"
+                    ) as in_memory:
+                        self.assertEqual(spilled.read(), in_memory.read(), name)
+                self.assertFalse(
+                    [name for name in os.listdir(directory) if name.endswith(".run")]
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+"""
+Optional neural network evaluation (NNUE style), needs `numpy`.
+
+The network is `768 -> HIDDEN_SIZE (x2 perspectives) -> 1`:
+features are (own/enemy, piece type, square) seen from one side, the
+first layer sums rows of `feature_weights` into an accumulator per side,
+and the output layer reads both accumulators, side to move first.
+The accumulators are updated on every make/unmake instead of being
+recomputed, see `Accumulator`.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+import engine
+import pieces
+import utils
+
+NUMBER_OF_FEATURES = 2 * len(utils.PieceType) * len(engine.SQUARE_NAMES)
+HIDDEN_SIZE = 64
+
+# quantization: accumulator activations are clipped to [0, QA],
+# output weights are scaled by QB
+QA = 255
+QB = 64
+# network output 1.0 => EVAL_SCALE centipawns
+EVAL_SCALE = 400
+# evaluations are clamped below the mate scores, see `engine.is_mate_score`
+MAX_EVALUATION = engine.MATE_SCORE - engine.MAX_PLY - 1
+
+PERSPECTIVES = (utils.Color.BLACK, utils.Color.WHITE)
+
+
+def _feature_index(
+    perspective: utils.Color, color: utils.Color, piece_type: utils.PieceType, square_name: str
+) -> int:
+    file, rank = engine.to_file_rank(square_name)
+    if perspective == utils.Color.WHITE:
+        # white pawns walk down the ranks, mirror so both sides look alike
+        rank = utils.Rank_8 + utils.Rank_1 - rank
+    square_index = (rank - utils.Rank_1) * len(utils.FILES) + file - utils.File_A
+    side = 0 if color == perspective else 1
+
+    return (side * len(utils.PieceType) + piece_type.value) * len(engine.SQUARE_NAMES) + square_index
+
+
+# (perspective, color, piece type, square name) => feature index
+FEATURE_INDEX = {
+    (perspective, color, piece_type, square_name): _feature_index(
+        perspective, color, piece_type, square_name
+    )
+    for perspective in PERSPECTIVES
+    for color in PERSPECTIVES
+    for piece_type in utils.PieceType
+    for square_name in engine.SQUARE_NAMES
+}
+
+# a board never holds more than 32 pieces
+MAX_ACTIVE_FEATURES = 32
+
+
+def active_features(position: engine.Position, perspective: utils.Color) -> list[int]:
+    """feature indices of all pieces of `position`, seen from `perspective`"""
+    return [
+        FEATURE_INDEX[(perspective, piece.color, piece.piece_type, square_name)]
+        for square_name, piece in position.get_board().items()
+        if piece is not None
+    ]
+
+
+@dataclass
+class Network:
+    feature_weights: np.ndarray  # int16, (NUMBER_OF_FEATURES, HIDDEN_SIZE)
+    feature_bias: np.ndarray  # int16, (HIDDEN_SIZE,)
+    output_weights: np.ndarray  # int8, (2 * HIDDEN_SIZE,)
+    output_bias: int  # int32
+
+    @classmethod
+    def load(cls, path: str) -> "Network":
+        """load weights saved by `save` (or by train_nnue.py)"""
+        with np.load(path) as data:
+            return cls(
+                feature_weights=data["feature_weights"].astype(np.int16),
+                feature_bias=data["feature_bias"].astype(np.int16),
+                output_weights=data["output_weights"].astype(np.int8),
+                output_bias=int(data["output_bias"]),
+            )
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            feature_weights=self.feature_weights,
+            feature_bias=self.feature_bias,
+            output_weights=self.output_weights,
+            output_bias=np.int32(self.output_bias),
+        )
+
+    @property
+    def hidden_size(self) -> int:
+        return self.feature_bias.shape[0]
+
+    def refresh(self, position: engine.Position, perspective: utils.Color) -> np.ndarray:
+        """first layer output computed from scratch"""
+        indices = active_features(position, perspective)
+        return self.feature_bias.astype(np.int32) + self.feature_weights[indices].sum(
+            axis=0, dtype=np.int32
+        )
+
+    def evaluate_accumulators(self, own: np.ndarray, enemy: np.ndarray) -> int:
+        """centipawns for the side whose accumulator is `own`"""
+        hidden = np.clip(np.concatenate((own, enemy)), 0, QA)
+        output = int(hidden @ self.output_weights.astype(np.int64)) + self.output_bias
+        return max(-MAX_EVALUATION, min(output * EVAL_SCALE // (QA * QB), MAX_EVALUATION))
+
+    def evaluate_batch(self, positions: list[engine.Position]) -> np.ndarray:
+        """
+        Score many positions in one vectorized pass, from the point of view
+        of each position's side to move.
+        """
+        padded_weights = np.vstack(
+            (self.feature_weights, np.zeros((1, self.hidden_size), dtype=np.int16))
+        )
+        # unused slots point to the zero row
+        indices = np.full(
+            (2, len(positions), MAX_ACTIVE_FEATURES), NUMBER_OF_FEATURES, dtype=np.int32
+        )
+        for row, position in enumerate(positions):
+            turn = position.get_turn()
+            for side, perspective in enumerate((turn, engine.opponent_of(turn))):
+                features = active_features(position, perspective)
+                indices[side, row, : len(features)] = features
+
+        accumulators = self.feature_bias.astype(np.int32) + padded_weights[indices].sum(
+            axis=2, dtype=np.int32
+        )
+        hidden = np.clip(np.concatenate((accumulators[0], accumulators[1]), axis=1), 0, QA)
+        # int64, `output * EVAL_SCALE` overflows int32 for large networks
+        output = hidden.astype(np.int64) @ self.output_weights.astype(np.int64) + self.output_bias
+
+        return np.clip(output * EVAL_SCALE // (QA * QB), -MAX_EVALUATION, MAX_EVALUATION)
+
+
+class Accumulator:
+    """
+    First layer output of both perspectives for the current board,
+    kept as a stack so `unmake_move` is a pop.
+    When the stack runs out (the accumulator was attached deeper than the
+    board was later unmade to) it is marked stale and rebuilt on next use.
+    """
+
+    def __init__(self, network: Network, position: engine.Position) -> None:
+        self.network = network
+        self.__position = position
+        self.__stack: list[dict[utils.Color, np.ndarray]] = []
+        self.__stale = True
+
+    def refresh(self) -> None:
+        self.__stack = [
+            {
+                perspective: self.network.refresh(self.__position, perspective)
+                for perspective in PERSPECTIVES
+            }
+        ]
+        self.__stale = False
+
+    def push(
+        self,
+        piece: pieces.Piece,
+        source_sq: str,
+        dest_sq: str,
+        captured_piece: Optional[pieces.Piece],
+    ) -> None:
+        """called by `engine.Position.make_move` before the board changes"""
+        if self.__stale:
+            return
+
+        weights = self.network.feature_weights
+        accumulators = {}
+        for perspective, accumulator in self.__stack[-1].items():
+            accumulator = accumulator - weights[
+                FEATURE_INDEX[(perspective, piece.color, piece.piece_type, source_sq)]
+            ]
+            accumulator += weights[
+                FEATURE_INDEX[(perspective, piece.color, piece.piece_type, dest_sq)]
+            ]
+            if captured_piece:
+                accumulator -= weights[
+                    FEATURE_INDEX[
+                        (perspective, captured_piece.color, captured_piece.piece_type, dest_sq)
+                    ]
+                ]
+            accumulators[perspective] = accumulator
+
+        self.__stack.append(accumulators)
+
+    def pop(self) -> None:
+        """called by `engine.Position.unmake_move` after the board is restored"""
+        if len(self.__stack) > 1:
+            self.__stack.pop()
+        else:
+            self.__stale = True
+
+    def evaluate(self) -> int:
+        if self.__stale:
+            self.refresh()
+
+        turn = self.__position.get_turn()
+        accumulators = self.__stack[-1]
+        return self.network.evaluate_accumulators(
+            accumulators[turn], accumulators[engine.opponent_of(turn)]
+        )
+
+
+class NNUEEvaluator:
+    """
+    Drop-in replacement for `engine.evaluate`:
+    `engine.SearchEngine(evaluator=NNUEEvaluator(Network.load(path)))`
+    """
+
+    def __init__(self, network: Network) -> None:
+        self.network = network
+
+    def attach(self, position: engine.Position) -> None:
+        """
+        Give `position` a fresh accumulator, called by the search on its root
+        so every make/unmake of the search tree is an incremental update.
+        """
+        position.accumulator = Accumulator(self.network, position)
+        position.accumulator.refresh()
+
+    def __call__(self, position: engine.Position) -> int:
+        accumulator = position.accumulator
+        if not isinstance(accumulator, Accumulator) or accumulator.network is not self.network:
+            self.attach(position)
+            accumulator = position.accumulator
+
+        return accumulator.evaluate()
@@ -0,0 +1,133 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+import engine
+import pieces
+import utils
+
+NUMPY_MISSING = importlib.util.find_spec("numpy") is None
+
+if not NUMPY_MISSING:
+    import numpy as np
+    import nnue
+
+
+def create_random_network(seed=0):
+    rng = np.random.default_rng(seed)
+    return nnue.Network(
+        feature_weights=rng.integers(
+            -64, 64, (nnue.NUMBER_OF_FEATURES, nnue.HIDDEN_SIZE), dtype=np.int16
+        ),
+        feature_bias=rng.integers(0, 64, nnue.HIDDEN_SIZE, dtype=np.int16),
+        output_weights=rng.integers(-64, 64, 2 * nnue.HIDDEN_SIZE, dtype=np.int8),
+        output_bias=100,
+    )
+
+
+@unittest.skipIf(NUMPY_MISSING, "numpy is not installed")
+class TestNNUE(unittest.TestCase):
+    def setUp(self) -> None:
+        self.network = create_random_network()
+        self.evaluator = nnue.NNUEEvaluator(self.network)
+        self.position = engine.Position(
+            pieces.create_initial_board(), utils.Color.BLACK
+        )
+
+    def full_evaluation(self, position):
+        turn = position.get_turn()
+        return self.network.evaluate_accumulators(
+            self.network.refresh(position, turn),
+            self.network.refresh(position, engine.opponent_of(turn)),
+        )
+
+    def test_incremental_matches_full_evaluation(self):
+        self.evaluator(self.position)
+        for move in [("E2", "E4"), ("D7", "D5"), ("E4", "D5"), ("D8", "D5")]:
+            self.position.make_move(move)
+            self.assertEqual(
+                self.evaluator(self.position), self.full_evaluation(self.position)
+            )
+
+        for _ in range(4):
+            self.position.unmake_move()
+            self.assertEqual(
+                self.evaluator(self.position), self.full_evaluation(self.position)
+            )
+
+    def test_search_updates_accumulator_incrementally(self):
+        counts = {"refreshes": 0, "evaluations": 0}
+        refresh = self.network.refresh
+        evaluate = self.network.evaluate_accumulators
+
+        def counting_refresh(position, perspective):
+            counts["refreshes"] += 1
+            return refresh(position, perspective)
+
+        def counting_evaluate(own, enemy):
+            counts["evaluations"] += 1
+            return evaluate(own, enemy)
+
+        self.network.refresh = counting_refresh
+        self.network.evaluate_accumulators = counting_evaluate
+
+        search_engine = engine.SearchEngine(
+            max_depth=3, time_limit=10, evaluator=self.evaluator
+        )
+        search_engine.search(self.position)
+
+        self.assertGreater(counts["evaluations"], 100)
+        # one refresh per perspective for the root of each search iteration
+        self.assertLessEqual(counts["refreshes"], 2 * 3)
+
+    def test_batch_matches_single_evaluation(self):
+        positions = [self.position.copy()]
+        for move in [("E2", "E4"), ("D7", "D5"), ("E4", "D5")]:
+            self.position.make_move(move)
+            positions.append(self.position.copy())
+
+        scores = self.network.evaluate_batch(positions)
+        self.assertEqual(list(scores), [self.full_evaluation(p) for p in positions])
+
+    def test_large_network_is_clamped_below_mate_scores(self):
+        positions = [self.position.copy()]
+        self.position.make_move(("E2", "E4"))
+        positions.append(self.position.copy())
+
+        for sign in (1, -1):
+            network = nnue.Network(
+                feature_weights=np.full(
+                    (nnue.NUMBER_OF_FEATURES, 128), np.iinfo(np.int16).max, dtype=np.int16
+                ),
+                feature_bias=np.zeros(128, dtype=np.int16),
+                output_weights=np.full(2 * 128, sign * 127, dtype=np.int8),
+                output_bias=0,
+            )
+            single_scores = [
+                nnue.NNUEEvaluator(network)(position) for position in positions
+            ]
+            self.assertEqual(single_scores, [sign * nnue.MAX_EVALUATION] * 2)
+            self.assertEqual(list(network.evaluate_batch(positions)), single_scores)
+            self.assertFalse(engine.is_mate_score(single_scores[0]))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.npz")
+            self.network.save(path)
+            loaded = nnue.Network.load(path)
+
+        self.assertEqual(
+            nnue.NNUEEvaluator(loaded)(self.position),
+            self.full_evaluation(self.position),
+        )
+
+    def test_search_with_network(self):
+        search_engine = engine.SearchEngine(
+            max_depth=2, time_limit=10, evaluator=self.evaluator
+        )
+        result = search_engine.search(self.position)
+        self.assertIn(result.best_move, self.position.generate_moves())
+
+
+if __name__ == "__main__":
+    unittest.main()
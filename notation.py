@@ -0,0 +1,328 @@
+"""
+Standard chess notation (FEN, SAN, coordinate moves) for this board.
+
+This board keeps white on ranks 7-8 and black on ranks 1-2, so a square
+of standard notation maps to the square with the mirrored rank here,
+e.g "e2" => "E7", "e7" => "E2".
+"""
+
+import re
+from typing import Optional
+
+import engine
+import pieces
+import utils
+
+STANDARD_START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+PIECE_LETTERS = {
+    utils.PieceType.PAWN: "p",
+    utils.PieceType.KNIGHT: "n",
+    utils.PieceType.BISHOP: "b",
+    utils.PieceType.ROOK: "r",
+    utils.PieceType.QUEEN: "q",
+    utils.PieceType.KING: "k",
+}
+LETTER_PIECE_TYPES = {
+    letter: piece_type for piece_type, letter in PIECE_LETTERS.items()
+}
+
+SAN_PATTERN = re.compile(
+    r"^(?P<piece>[NBRQK])?(?P<file>[a-h])?(?P<rank>[1-8])?x?"
+    r"(?P<dest>[a-h][1-8])(?:=?(?P<promotion>[NBRQ]))?[+#]?[!?]*$"
+)
+CASTLING_PATTERN = re.compile(r"^(?P<castling>[O0]-[O0](?:-[O0])?)[+#]?[!?]*$")
+
+
+def standard_to_square_name(standard_square: str) -> str:
+    """E.g "e2" => "E7" """
+    rank = int(standard_square[1])
+    return f"{standard_square[0].upper()}{utils.Rank_8 + utils.Rank_1 - rank}"
+
+
+def square_name_to_standard(square_name: str) -> str:
+    """E.g "E7" => "e2" """
+    rank = int(square_name[1:])
+    return f"{square_name[0].lower()}{utils.Rank_8 + utils.Rank_1 - rank}"
+
+
+def move_to_standard(
+    move: engine.Move, promotion: Optional[utils.PieceType] = None
+) -> str:
+    """E.g ("E7", "E5") => "e2e4" """
+    return (
+        square_name_to_standard(move[0])
+        + square_name_to_standard(move[1])
+        + (PIECE_LETTERS[promotion] if promotion else "")
+    )
+
+
+def parse_fen(fen: str) -> tuple[dict[str, pieces.Piece], utils.Color]:
+    """
+    Board and side to move of a FEN string.
+    Castling, en passant and move counters are ignored, this game has no such rules.
+    """
+    fields = fen.split()
+    if len(fields) < 2 or fields[1] not in ("w", "b"):
+        raise ValueError(f"invalid FEN: {fen!r}")
+
+    ranks = fields[0].split("/")
+    if len(ranks) != len(utils.RANKS):
+        raise ValueError(f"invalid FEN: {fen!r}")
+
+    board: dict[str, pieces.Piece] = {}
+    for rank_index, rank_text in enumerate(ranks):
+        # FEN starts from rank 8 of standard notation, which is rank 1 here
+        rank = utils.Rank_1 + rank_index
+        file = utils.File_A
+        for letter in rank_text:
+            if letter.isdigit():
+                file += int(letter)
+                continue
+            if (
+                letter.lower() not in LETTER_PIECE_TYPES
+                or not utils.is_file_within_board(file)
+            ):
+                raise ValueError(f"invalid FEN: {fen!r}")
+
+            color = utils.Color.WHITE if letter.isupper() else utils.Color.BLACK
+            piece_class = pieces.PIECE_CLASSES[LETTER_PIECE_TYPES[letter.lower()]]
+            board[utils.create_square_name(file, rank)] = piece_class(color=color)
+            file += 1
+
+        if file != utils.MAX_FILE + 1:
+            raise ValueError(f"invalid FEN: {fen!r}")
+
+    turn = utils.Color.WHITE if fields[1] == "w" else utils.Color.BLACK
+    return board, turn
+
+
+def position_from_fen(fen: str) -> engine.Position:
+    return engine.Position(*parse_fen(fen))
+
+
+def to_fen(position: engine.Position) -> str:
+    """FEN of `position`, with empty castling and en passant fields"""
+    board = position.get_board()
+    ranks: list[str] = []
+    for rank in utils.RANKS:
+        rank_text = ""
+        empty_squares = 0
+        for file in utils.FILES:
+            piece = board[utils.create_square_name(file, rank)]
+            if piece is None:
+                empty_squares += 1
+                continue
+            if empty_squares:
+                rank_text += str(empty_squares)
+                empty_squares = 0
+            letter = PIECE_LETTERS[piece.piece_type]
+            rank_text += letter.upper() if piece.color == utils.Color.WHITE else letter
+        if empty_squares:
+            rank_text += str(empty_squares)
+        ranks.append(rank_text)
+
+    turn = "w" if position.get_turn() == utils.Color.WHITE else "b"
+    return f"{'/'.join(ranks)} {turn} - - 0 1"
+
+
+def pawn_direction(color: utils.Color) -> int:
+    """rank delta of a pawn step, black pawns walk up the ranks here"""
+    return 1 if color == utils.Color.BLACK else -1
+
+
+def _home_rank(color: utils.Color) -> int:
+    return utils.Rank_1 if color == utils.Color.BLACK else utils.Rank_8
+
+
+def _king_square(position: engine.Position, color: utils.Color) -> Optional[str]:
+    for square_name, piece in position.get_board().items():
+        if piece and piece.color == color and piece.piece_type == utils.PieceType.KING:
+            return square_name
+    return None
+
+
+def _holds(
+    piece: Optional[pieces.Piece], color: utils.Color, piece_type: utils.PieceType
+) -> bool:
+    return piece is not None and piece.color == color and piece.piece_type == piece_type
+
+
+def is_en_passant(position: engine.Position, move: engine.Move) -> bool:
+    """
+    Check if `move` is a pawn capturing en passant, i.e the enemy pawn beside
+    it has just made a double step past its destination.
+    """
+    board = position.get_board()
+    source_sq, dest_sq = move
+    turn = position.get_turn()
+    if board.get(dest_sq) is not None or not _holds(
+        board.get(source_sq), turn, utils.PieceType.PAWN
+    ):
+        return False
+
+    source_file, source_rank = engine.to_file_rank(source_sq)
+    dest_file, dest_rank = engine.to_file_rank(dest_sq)
+    if abs(dest_file - source_file) != 1 or dest_rank - source_rank != pawn_direction(
+        turn
+    ):
+        return False
+
+    passed_pawn_sq = utils.create_square_name(dest_file, source_rank)
+    double_step = (
+        utils.create_square_name(dest_file, dest_rank + pawn_direction(turn)),
+        passed_pawn_sq,
+    )
+    return (
+        _holds(board[passed_pawn_sq], engine.opponent_of(turn), utils.PieceType.PAWN)
+        and position.last_move() == double_step
+    )
+
+
+def leaves_king_attacked(position: engine.Position, move: engine.Move) -> bool:
+    """check if `move` puts or leaves the mover's own king in check"""
+    color = position.get_turn()
+    position.make_move(move)
+    king_square = _king_square(position, color)
+    attacked = king_square is not None and (
+        position.least_valuable_attacker(king_square, engine.opponent_of(color), set())
+        is not None
+    )
+    position.unmake_move()
+
+    return attacked
+
+
+def parse_san(
+    position: engine.Position, san: str
+) -> tuple[engine.Move, Optional[utils.PieceType]]:
+    """
+    Resolve a SAN move such as "Nbd7", "exd5", "e8=Q" or "O-O" for the
+    side to move, returns `(move, promotion piece type)`.
+    Castling is returned as the king's move, see `make_standard_move`.
+    """
+    board = position.get_board()
+    turn = position.get_turn()
+
+    if match := CASTLING_PATTERN.match(san):
+        rank = _home_rank(turn)
+        if match["castling"].count("-") == 2:
+            dest_file, rook_file, between_files = utils.File_C, utils.File_A, "BCD"
+        else:
+            dest_file, rook_file, between_files = utils.File_G, utils.File_H, "FG"
+
+        king = board[utils.create_square_name(utils.File_E, rank)]
+        rook = board[utils.create_square_name(rook_file, rank)]
+        if (
+            not _holds(king, turn, utils.PieceType.KING)
+            or not _holds(rook, turn, utils.PieceType.ROOK)
+            or any(board[f"{file}{rank}"] for file in between_files)
+        ):
+            raise ValueError(f"illegal SAN move: {san!r}")
+
+        return (
+            utils.create_square_name(utils.File_E, rank),
+            utils.create_square_name(dest_file, rank),
+        ), None
+
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        raise ValueError(f"invalid SAN move: {san!r}")
+
+    dest_sq = standard_to_square_name(match["dest"])
+    promotion = (
+        LETTER_PIECE_TYPES[match["promotion"].lower()] if match["promotion"] else None
+    )
+
+    if match["piece"] is None:
+        # pawn move, the source square follows from the destination
+        dest_file, dest_rank = engine.to_file_rank(dest_sq)
+        source_rank = dest_rank - pawn_direction(turn)
+        if match["file"] and match["file"].upper() != chr(dest_file):
+            source_sq = utils.create_square_name(
+                ord(match["file"].upper()), source_rank
+            )
+        else:
+            source_sq = utils.create_square_name(dest_file, source_rank)
+            if not _holds(board.get(source_sq), turn, utils.PieceType.PAWN):
+                # a double step from the initial rank
+                source_sq = utils.create_square_name(
+                    dest_file, source_rank - pawn_direction(turn)
+                )
+
+        pawn = board.get(source_sq)
+        if not _holds(pawn, turn, utils.PieceType.PAWN) or (
+            dest_sq
+            not in pawn.calculate_available_moves(
+                engine.to_file_rank(source_sq), position
+            )
+            and not is_en_passant(position, (source_sq, dest_sq))
+        ):
+            raise ValueError(f"illegal SAN move: {san!r}")
+        if (promotion is None) == (dest_rank == _home_rank(engine.opponent_of(turn))):
+            raise ValueError(f"illegal SAN move: {san!r}")
+
+        return (source_sq, dest_sq), promotion
+
+    piece_type = LETTER_PIECE_TYPES[match["piece"].lower()]
+    candidates: list[engine.Move] = []
+    for square_name, piece in board.items():
+        if piece is None or piece.color != turn or piece.piece_type != piece_type:
+            continue
+        if match["file"] and square_name[0] != match["file"].upper():
+            continue
+        if match["rank"] and square_name_to_standard(square_name)[1] != match["rank"]:
+            continue
+        if dest_sq in piece.calculate_available_moves(
+            engine.to_file_rank(square_name), position
+        ):
+            candidates.append((square_name, dest_sq))
+
+    if len(candidates) > 1:
+        candidates = [
+            move for move in candidates if not leaves_king_attacked(position, move)
+        ]
+    if len(candidates) != 1:
+        raise ValueError(f"illegal or ambiguous SAN move: {san!r}")
+
+    return candidates[0], None
+
+
+def make_standard_move(
+    position: engine.Position,
+    move: engine.Move,
+    promotion: Optional[utils.PieceType] = None,
+) -> None:
+    """
+    Play `move` with the rules of standard chess this game leaves out:
+    castling moves the rook too, en passant removes the passed pawn and
+    a promoted pawn is replaced.
+    """
+    board = position.get_board()
+    source_sq, dest_sq = move
+    piece = board[source_sq]
+    source_file, source_rank = engine.to_file_rank(source_sq)
+    dest_file, _ = engine.to_file_rank(dest_sq)
+
+    is_castling = (
+        piece.piece_type == utils.PieceType.KING and abs(dest_file - source_file) == 2
+    )
+    en_passant = is_en_passant(position, move)
+
+    position.make_move(move)
+
+    if is_castling:
+        rook_file, rook_dest_file = (
+            (utils.File_H, utils.File_F)
+            if dest_file == utils.File_G
+            else (utils.File_A, utils.File_D)
+        )
+        rook_sq = utils.create_square_name(rook_file, source_rank)
+        rook = board[rook_sq]
+        position.put_piece(rook_sq, None)
+        position.put_piece(utils.create_square_name(rook_dest_file, source_rank), rook)
+    elif en_passant:
+        position.put_piece(utils.create_square_name(dest_file, source_rank), None)
+
+    if promotion:
+        position.put_piece(dest_sq, pieces.PIECE_CLASSES[promotion](color=piece.color))
@@ -0,0 +1,85 @@
+import unittest
+import engine
+import notation
+import pieces
+import utils
+
+
+class TestNotation(unittest.TestCase):
+    def test_square_names(self):
+        self.assertEqual(notation.standard_to_square_name("e2"), "E7")
+        self.assertEqual(notation.square_name_to_standard("E7"), "e2")
+        self.assertEqual(notation.move_to_standard(("E7", "E5")), "e2e4")
+
+    def test_start_fen_matches_initial_board(self):
+        position = notation.position_from_fen(notation.STANDARD_START_FEN)
+        initial = engine.Position(pieces.create_initial_board(), utils.Color.WHITE)
+        self.assertEqual(position.key, initial.key)
+        self.assertEqual(notation.to_fen(position), notation.STANDARD_START_FEN)
+
+    def test_invalid_fen(self):
+        with self.assertRaises(ValueError):
+            notation.parse_fen("rnbqkbnr/pppppppp/8/8 w - - 0 1")
+
+    def test_parse_san(self):
+        position = notation.position_from_fen(notation.STANDARD_START_FEN)
+        for san in "e4 d5 exd5 Nf6 Nc3 Nxd5 Nf3 Bg4 Be2 e6 O-O".split():
+            move, promotion = notation.parse_san(position, san)
+            notation.make_standard_move(position, move, promotion)
+
+        self.assertEqual(
+            notation.to_fen(position),
+            "rn1qkb1r/ppp2ppp/4p3/3n4/6b1/2N2N2/PPPPBPPP/R1BQ1RK1 b - - 0 1",
+        )
+
+    def test_pinned_piece_needs_no_disambiguation(self):
+        # the knight on c3 is pinned, so "Ne2" can only be the g1 knight
+        position = notation.position_from_fen("4k3/8/8/b7/8/2N5/8/4K1N1 w - - 0 1")
+        self.assertEqual(notation.parse_san(position, "Ne2"), (("G8", "E7"), None))
+
+    def test_promotion_and_en_passant(self):
+        position = notation.position_from_fen("4k3/P7/8/8/1p6/8/2P5/4K3 w - - 0 1")
+        for san in ["a8=Q", "Kd7", "c4", "bxc3"]:
+            move, promotion = notation.parse_san(position, san)
+            notation.make_standard_move(position, move, promotion)
+
+        self.assertEqual(notation.to_fen(position), "Q7/3k4/8/8/8/2p5/8/4K3 w - - 0 1")
+
+    def test_illegal_pawn_moves(self):
+        for sans in [
+            ["Nf3", "e5", "f4"],  # double step over the knight
+            ["e5"],  # no pawn can get there
+            ["exd3"],  # capturing nothing
+            ["e4", "a6", "e5", "d5", "a3", "h6", "exd6"],  # en passant too late
+            [
+                "a4",
+                "b5",
+                "axb5",
+                "a6",
+                "bxa6",
+                "Nf6",
+                "a7",
+                "Ng8",
+                "axb8",
+            ],  # no promotion
+        ]:
+            position = notation.position_from_fen(notation.STANDARD_START_FEN)
+            for san in sans[:-1]:
+                move, promotion = notation.parse_san(position, san)
+                notation.make_standard_move(position, move, promotion)
+            with self.assertRaises(ValueError, msg=sans):
+                notation.parse_san(position, sans[-1])
+
+    def test_illegal_castling(self):
+        position = notation.position_from_fen(notation.STANDARD_START_FEN)
+        with self.assertRaises(ValueError):
+            notation.parse_san(position, "O-O")
+
+    def test_en_passant_needs_double_step(self):
+        position = notation.position_from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - - 0 1")
+        with self.assertRaises(ValueError):
+            notation.parse_san(position, "exd6")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -258,3 +258,41 @@ class PieceKing(Piece):
                 moves.add(dest_position_name)
 
         return moves
+
+
+INITIAL_PIECE_CLASSES = [
+    PieceRook,
+    PieceKnight,
+    PieceBishop,
+    PieceQueen,
+    PieceKing,
+    PieceBishop,
+    PieceKnight,
+    PieceRook,
+]
+
+
+def create_initial_board() -> dict[str, Piece]:
+    """pieces in their initial places for a new game, by square name"""
+    board: dict[str, Piece] = {}
+    for index, file in enumerate(utils.FILES):
+        for color, pawn_rank, piece_rank in [
+            (utils.Color.BLACK, utils.Rank_2, utils.Rank_1),
+            (utils.Color.WHITE, utils.Rank_7, utils.Rank_8),
+        ]:
+            board[utils.create_square_name(file, pawn_rank)] = PiecePawn(color=color)
+            board[utils.create_square_name(file, piece_rank)] = INITIAL_PIECE_CLASSES[
+                index
+            ](color=color)
+
+    return board
+
+
+PIECE_CLASSES: dict[utils.PieceType, type[Piece]] = {
+    utils.PieceType.PAWN: PiecePawn,
+    utils.PieceType.KNIGHT: PieceKnight,
+    utils.PieceType.BISHOP: PieceBishop,
+    utils.PieceType.ROOK: PieceRook,
+    utils.PieceType.QUEEN: PieceQueen,
+    utils.PieceType.KING: PieceKing,
+}
@@ -0,0 +1,218 @@
+"""
+Fit an `nnue.Network` on self-play games of the search engine.
+
+    python3 train_nnue.py --games 200 --output network.npz
+
+Each searched position is labelled with a blend of the search score and
+the final game result, both as win probabilities of the side to move.
+"""
+import argparse
+import random
+from typing import Optional
+
+import numpy as np
+
+import engine
+import nnue
+import pieces
+import utils
+
+
+def play_self_play_game(
+    search_engine: engine.SearchEngine,
+    rng: random.Random,
+    random_plies: int,
+    max_plies: int,
+) -> tuple[list[tuple[list[int], list[int], int, utils.Color]], Optional[utils.Color]]:
+    """
+    Returns `(records, winner)`, a record is
+    `(own features, enemy features, search score, side to move)`.
+    The first `random_plies` moves are random so games do not repeat.
+    """
+    search_engine.new_game()
+    position = engine.Position(pieces.create_initial_board(), utils.Color.BLACK)
+    records = []
+
+    for ply in range(max_plies):
+        moves = position.generate_moves()
+        if not moves:
+            break
+
+        if ply < random_plies:
+            move = rng.choice(moves)
+        else:
+            turn = position.get_turn()
+            result = search_engine.search(position)
+            records.append(
+                (
+                    nnue.active_features(position, turn),
+                    nnue.active_features(position, engine.opponent_of(turn)),
+                    result.score,
+                    turn,
+                )
+            )
+            move = result.best_move
+
+        position.make_move(move)
+        if position.last_move_captured_king():
+            return records, engine.opponent_of(position.get_turn())
+
+    return records, None
+
+
+def sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-values))
+
+
+def create_dataset(
+    games: int, depth: int, result_weight: float, seed: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """dense own / enemy feature matrices and target win probabilities"""
+    rng = random.Random(seed)
+    search_engine = engine.SearchEngine(max_depth=depth, time_limit=1.0)
+    own_rows, enemy_rows, targets = [], [], []
+
+    for game_index in range(games):
+        records, winner = play_self_play_game(
+            search_engine, rng, random_plies=rng.randint(2, 8), max_plies=200
+        )
+        for own, enemy, score, turn in records:
+            if winner is None:
+                outcome = 0.5
+            else:
+                outcome = 1.0 if winner == turn else 0.0
+            score_probability = sigmoid(np.clip(score, -2000, 2000) / nnue.EVAL_SCALE)
+
+            own_rows.append(own)
+            enemy_rows.append(enemy)
+            targets.append((1 - result_weight) * score_probability + result_weight * outcome)
+
+        print(f"game {game_index + 1}/{games}: {len(records)} positions, winner {winner}")
+
+    own_features = np.zeros((len(targets), nnue.NUMBER_OF_FEATURES), dtype=np.float32)
+    enemy_features = np.zeros_like(own_features)
+    for row, (own, enemy) in enumerate(zip(own_rows, enemy_rows)):
+        own_features[row, own] = 1
+        enemy_features[row, enemy] = 1
+
+    return own_features, enemy_features, np.array(targets, dtype=np.float32)
+
+
+def train(
+    own_features: np.ndarray,
+    enemy_features: np.ndarray,
+    targets: np.ndarray,
+    hidden_size: int,
+    epochs: int,
+    batch_size: int,
+    learning_rate: float,
+    seed: int,
+) -> nnue.Network:
+    """
+    Mini batch Adam on the float network, then quantize it.
+    The float network mirrors the quantized one: activations clipped to
+    [0, 1] stand for [0, QA] and an output of 1.0 is EVAL_SCALE centipawns.
+    """
+    rng = np.random.default_rng(seed)
+    parameters = {
+        "feature_weights": rng.normal(0, 0.01, (nnue.NUMBER_OF_FEATURES, hidden_size)),
+        "feature_bias": np.zeros(hidden_size),
+        "output_weights": rng.normal(0, 0.01, 2 * hidden_size),
+        "output_bias": np.zeros(1),
+    }
+    limits = {
+        "feature_weights": np.iinfo(np.int16).max / nnue.QA,
+        "feature_bias": np.iinfo(np.int16).max / nnue.QA,
+        "output_weights": np.iinfo(np.int8).max / nnue.QB,
+        "output_bias": np.inf,
+    }
+    first_moments = {name: np.zeros_like(value) for name, value in parameters.items()}
+    second_moments = {name: np.zeros_like(value) for name, value in parameters.items()}
+    step = 0
+
+    for epoch in range(epochs):
+        order = rng.permutation(len(targets))
+        total_loss = 0.0
+
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+            own, enemy, target = own_features[batch], enemy_features[batch], targets[batch]
+
+            accumulators = np.concatenate(
+                (
+                    own @ parameters["feature_weights"] + parameters["feature_bias"],
+                    enemy @ parameters["feature_weights"] + parameters["feature_bias"],
+                ),
+                axis=1,
+            )
+            hidden = np.clip(accumulators, 0, 1)
+            prediction = sigmoid(hidden @ parameters["output_weights"] + parameters["output_bias"])
+            total_loss += float(np.sum((prediction - target) ** 2))
+
+            output_gradient = 2 * (prediction - target) * prediction * (1 - prediction) / len(batch)
+            hidden_gradient = np.outer(output_gradient, parameters["output_weights"]) * (
+                (accumulators > 0) & (accumulators < 1)
+            )
+            gradients = {
+                "feature_weights": own.T @ hidden_gradient[:, :hidden_size]
+                + enemy.T @ hidden_gradient[:, hidden_size:],
+                "feature_bias": hidden_gradient[:, :hidden_size].sum(axis=0)
+                + hidden_gradient[:, hidden_size:].sum(axis=0),
+                "output_weights": hidden.T @ output_gradient,
+                "output_bias": np.array([output_gradient.sum()]),
+            }
+
+            step += 1
+            for name, gradient in gradients.items():
+                first_moments[name] = 0.9 * first_moments[name] + 0.1 * gradient
+                second_moments[name] = 0.999 * second_moments[name] + 0.001 * gradient**2
+                corrected_first = first_moments[name] / (1 - 0.9**step)
+                corrected_second = second_moments[name] / (1 - 0.999**step)
+                parameters[name] -= (
+                    learning_rate * corrected_first / (np.sqrt(corrected_second) + 1e-8)
+                )
+                np.clip(parameters[name], -limits[name], limits[name], out=parameters[name])
+
+        print(f"epoch {epoch + 1}/{epochs}: loss {total_loss / len(targets):.5f}")
+
+    return nnue.Network(
+        feature_weights=np.round(parameters["feature_weights"] * nnue.QA).astype(np.int16),
+        feature_bias=np.round(parameters["feature_bias"] * nnue.QA).astype(np.int16),
+        output_weights=np.round(parameters["output_weights"] * nnue.QB).astype(np.int8),
+        output_bias=int(np.round(parameters["output_bias"][0] * nnue.QA * nnue.QB)),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="train a NNUE network by self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=2, help="self-play search depth")
+    parser.add_argument(
+        "--result-weight",
+        type=float,
+        default=0.5,
+        help="share of the game result in the labels, the rest is the search score",
+    )
+    parser.add_argument("--hidden-size", type=int, default=nnue.HIDDEN_SIZE)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="network.npz")
+    args = parser.parse_args()
+
+    own_features, enemy_features, targets = create_dataset(
+        args.games, args.depth, args.result_weight, args.seed
+    )
+    network = train(
+        own_features,
+        enemy_features,
+        targets,
+        args.hidden_size,
+        args.epochs,
+        args.batch_size,
+        args.learning_rate,
+        args.seed,
+    )
+    network.save(args.output)
+    print(f"saved {args.output}")